@@ -50,6 +50,24 @@ class Settings(BaseSettings):
     enable_gpu: bool = Field(
         default=True, description="Enable GPU acceleration if available"
     )
+    use_tensorrt: bool = Field(
+        default=False, description="Export and run the YOLO model as an FP16 TensorRT engine on CUDA"
+    )
+    use_openvino: bool = Field(
+        default=False, description="Export and run the YOLO model as an INT8 OpenVINO IR on CPU"
+    )
+    reid_quantize_int8: bool = Field(
+        default=False, description="Post-training quantize the ReID model to int8 for CPU inference"
+    )
+    reid_compile: bool = Field(
+        default=False, description="Compile the ReID forward with torch.compile (TorchScript fallback) at load time"
+    )
+    calibration_yaml: str = Field(
+        default="coco128.yaml", description="Dataset YAML used to calibrate INT8 quantization"
+    )
+    detection_imgsz: int = Field(
+        default=640, ge=32, description="YOLO inference input size used for engine export"
+    )
     
     # Database Configuration
     database_host: str = Field(
@@ -86,6 +104,12 @@ class Settings(BaseSettings):
     reid_feature_dimension: int = Field(
         default=512, description="ReID feature vector dimension"
     )
+    reid_ivf_threshold: int = Field(
+        default=2000, ge=1, description="Indexed horse count at which ReID search switches from flat to IVF"
+    )
+    reid_ivf_nprobe: int = Field(
+        default=8, ge=1, description="Number of IVF lists probed per ReID similarity search"
+    )
 
     # Frame Processing Configuration
     frame_skip_interval: int = Field(
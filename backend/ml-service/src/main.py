@@ -154,6 +154,8 @@ async def lifespan(app: FastAPI):
     finally:
         # Shutdown
         logger.info("ML service shutting down")
+        if processor is not None:
+            await processor.close()
 
 
 # Create FastAPI app
@@ -21,6 +21,11 @@ try:
 except ImportError:
     HAS_SCIPY = False
     logger.warning("SciPy not available - some advanced features disabled")
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -56,7 +61,19 @@ class TemporalAction(Enum):
     GRAZING = "grazing"
     NONE = "none"
 
-@dataclass
+# Keypoint regions used by single-frame body state detection
+_REGION_HOOF, _REGION_HIP, _REGION_SHOULDER = 0, 1, 2
+_BODY_REGIONS = {
+    'L_F_Paw': _REGION_HOOF, 'R_F_Paw': _REGION_HOOF,
+    'L_B_Paw': _REGION_HOOF, 'R_B_Paw': _REGION_HOOF,
+    'L_Hip': _REGION_HIP, 'R_Hip': _REGION_HIP,
+    'L_Shoulder': _REGION_SHOULDER, 'R_Shoulder': _REGION_SHOULDER,
+}
+
+# Head positions that count as looking back at the body
+_HEAD_BACK_POSITIONS = frozenset({HeadPosition.HEAD_LEFT_BACK, HeadPosition.HEAD_RIGHT_BACK})
+
+@dataclass(slots=True)
 class StateDetectionResult:
     """Complete state detection result"""
     frame_idx: int
@@ -84,7 +101,8 @@ class StateDetectionResult:
     # Alerts
     alerts: List[str] = field(default_factory=list)
     
-    # Raw pose data for comprehensive analysis
+    # Raw pose data for comprehensive analysis (held by reference, not copied;
+    # callers hand over a fresh dict per frame and must not mutate it afterwards)
     pose_data: Dict[str, Any] = field(default_factory=dict)
     
     def to_dict(self) -> Dict:
@@ -161,6 +179,19 @@ class AdvancedStateDetector:
     Advanced two-tier state detection system with configurable thresholds
     """
     
+    __slots__ = (
+        'config', 'body_state_buffer', 'head_position_buffer',
+        'temporal_buffer_short', 'temporal_buffer_long',
+        'current_body_state', 'current_head_position', 'frame_count'
+    )
+    
+    # Keypoint names for RTMPose AP10K
+    keypoint_names = (
+        'Nose', 'L_Eye', 'R_Eye', 'Neck', 'L_Shoulder', 'R_Shoulder',
+        'L_Elbow', 'R_Elbow', 'L_F_Paw', 'R_F_Paw', 'Root_of_tail',
+        'L_Hip', 'R_Hip', 'L_Knee', 'R_Knee', 'L_B_Paw', 'R_B_Paw'
+    )
+    
     def __init__(self, config_path: Optional[str] = None):
         """
         Initialize detector with configuration
@@ -193,16 +224,6 @@ class AdvancedStateDetector:
         
         # Frame counter
         self.frame_count = 0
-        
-        # Alert tracking
-        self.last_alert_time = {}
-        
-        # Keypoint names for RTMPose AP10K
-        self.keypoint_names = [
-            'Nose', 'L_Eye', 'R_Eye', 'Neck', 'L_Shoulder', 'R_Shoulder',
-            'L_Elbow', 'R_Elbow', 'L_F_Paw', 'R_F_Paw', 'Root_of_tail',
-            'L_Hip', 'R_Hip', 'L_Knee', 'R_Knee', 'L_B_Paw', 'R_B_Paw'
-        ]
     
     def _load_config(self, config_path: Optional[str]) -> Dict:
         """Load configuration from YAML file or use defaults"""
@@ -299,49 +320,54 @@ class AdvancedStateDetector:
             (state, confidence, raw_scores)
         """
         raw_scores = {}
-        
+        body_config = self.config['single_frame']['body_state']
+        bbox_height = bbox['height']
+
         # Calculate key metrics
-        aspect_ratio = bbox['width'] / bbox['height'] if bbox['height'] > 0 else 1.0
-        
-        # Get hoof positions
-        hooves = ['L_F_Paw', 'R_F_Paw', 'L_B_Paw', 'R_B_Paw']
-        hoof_positions = []
-        for hoof in hooves:
-            if hoof in keypoints and keypoints[hoof]['confidence'] > 0.3:
-                hoof_positions.append(keypoints[hoof])
-        
-        # Get body positions
-        hips = ['L_Hip', 'R_Hip']
-        shoulders = ['L_Shoulder', 'R_Shoulder']
-        
-        hip_positions = [keypoints[h] for h in hips if h in keypoints and keypoints[h]['confidence'] > 0.3]
-        shoulder_positions = [keypoints[s] for s in shoulders if s in keypoints and keypoints[s]['confidence'] > 0.3]
-        
+        aspect_ratio = bbox['width'] / bbox_height if bbox_height > 0 else 1.0
+
+        # Single pass over the keypoints accumulating per-region sums and counts.
+        # Hooves above this y are off the ground (clearance measured from bbox bottom).
+        off_ground_y = bbox['y'] + bbox_height - bbox_height * body_config['jumping_ground_clearance']
+        n_hoof = hooves_off_ground = 0
+        n_hip = n_shoulder = 0
+        sum_hip_y = sum_shoulder_y = 0.0
+        for name, kp in keypoints.items():
+            region = _BODY_REGIONS.get(name)
+            if region is None or kp['confidence'] <= 0.3:
+                continue
+            y = kp['y']
+            if region == _REGION_HOOF:
+                n_hoof += 1
+                if y < off_ground_y:
+                    hooves_off_ground += 1
+            elif region == _REGION_HIP:
+                n_hip += 1
+                sum_hip_y += y
+            else:
+                n_shoulder += 1
+                sum_shoulder_y += y
+
         # Check for lying down
-        if aspect_ratio > self.config['single_frame']['body_state']['lying_aspect_ratio']:
-            if hip_positions:
-                avg_hip_y = np.mean([h['y'] for h in hip_positions])
-                hip_ratio = (avg_hip_y - bbox['y']) / bbox['height']
-                if hip_ratio > self.config['single_frame']['body_state']['lying_hip_threshold']:
+        if aspect_ratio > body_config['lying_aspect_ratio']:
+            if n_hip:
+                avg_hip_y = sum_hip_y / n_hip
+                hip_ratio = (avg_hip_y - bbox['y']) / bbox_height
+                if hip_ratio > body_config['lying_hip_threshold']:
                     raw_scores['lying_down'] = 0.9
                     return BodyState.LYING_DOWN, 0.9, raw_scores
-        
+
         # Check for jumping (all hooves off ground)
-        if len(hoof_positions) >= 3:
-            ground_level = bbox['y'] + bbox['height']
-            hooves_off_ground = sum(1 for h in hoof_positions 
-                                   if (ground_level - h['y']) > bbox['height'] * 
-                                   self.config['single_frame']['body_state']['jumping_ground_clearance'])
-            if hooves_off_ground >= 3:
-                raw_scores['jumping'] = 0.85
-                return BodyState.JUMPING, 0.85, raw_scores
-        
+        if n_hoof >= 3 and hooves_off_ground >= 3:
+            raw_scores['jumping'] = 0.85
+            return BodyState.JUMPING, 0.85, raw_scores
+
         # Check for kneeling
-        if shoulder_positions and hip_positions:
-            avg_shoulder_y = np.mean([s['y'] for s in shoulder_positions])
-            avg_hip_y = np.mean([h['y'] for h in hip_positions])
-            height_diff = abs(avg_shoulder_y - avg_hip_y) / bbox['height']
-            if height_diff > self.config['single_frame']['body_state']['kneeling_height_diff']:
+        if n_shoulder and n_hip:
+            avg_shoulder_y = sum_shoulder_y / n_shoulder
+            avg_hip_y = sum_hip_y / n_hip
+            height_diff = abs(avg_shoulder_y - avg_hip_y) / bbox_height
+            if height_diff > body_config['kneeling_height_diff']:
                 if avg_shoulder_y > avg_hip_y:  # Front lower than back
                     raw_scores['kneeling'] = 0.75
                     return BodyState.KNEELING, 0.75, raw_scores
@@ -445,13 +471,17 @@ class AdvancedStateDetector:
             last_frame = self.extract_keypoints_dict(frames[-1])
             
             if 'Neck' in first_frame and 'Neck' in last_frame:
-                distance = math.sqrt(
-                    (last_frame['Neck']['x'] - first_frame['Neck']['x'])**2 +
-                    (last_frame['Neck']['y'] - first_frame['Neck']['y'])**2
+                distance = math.hypot(
+                    last_frame['Neck']['x'] - first_frame['Neck']['x'],
+                    last_frame['Neck']['y'] - first_frame['Neck']['y']
                 )
                 
                 # Estimate body length from bbox
-                avg_body_length = np.mean([f.get('bbox', {}).get('width', 0) for f in frames if 'bbox' in f])
+                widths = np.fromiter(
+                    (f['bbox'].get('width', 0) for f in frames if 'bbox' in f),
+                    dtype=np.float64, count=-1
+                )
+                avg_body_length = widths.mean() if widths.size else 0.0
                 if avg_body_length > 0:
                     body_lengths_moved = distance / avg_body_length
                     time_seconds = len(frames) / 30.0  # Assuming 30 fps
@@ -523,7 +553,7 @@ class AdvancedStateDetector:
                 head_position=HeadPosition.HEAD_NEUTRAL,
                 head_confidence=0.0,
                 head_angle=0.0,
-                pose_data=pose_data.copy()
+                pose_data=pose_data
             )
         
         # Single-frame detection
@@ -589,7 +619,7 @@ class AdvancedStateDetector:
             action_5s_confidence=action_5s_conf,
             measurements=measurements,
             alerts=alerts,
-            pose_data=pose_data.copy()
+            pose_data=pose_data
         )
     
     def check_for_alerts(self, body_state: BodyState, head_position: HeadPosition, 
@@ -597,11 +627,15 @@ class AdvancedStateDetector:
         """Check for concerning state combinations"""
         alerts = []
         
+        # Every alert requires the horse to be looking back
+        if head_position not in _HEAD_BACK_POSITIONS:
+            return alerts
+        
         # Check for colic signs
-        if body_state == BodyState.LYING_DOWN and head_position in [HeadPosition.HEAD_LEFT_BACK, HeadPosition.HEAD_RIGHT_BACK]:
+        if body_state == BodyState.LYING_DOWN:
             alerts.append("⚠️ Possible colic: Horse lying down and looking at abdomen")
         
-        if action == TemporalAction.PAWING_GROUND and head_position in [HeadPosition.HEAD_LEFT_BACK, HeadPosition.HEAD_RIGHT_BACK]:
+        if action == TemporalAction.PAWING_GROUND:
             alerts.append("⚠️ Discomfort: Horse pawing and looking back")
         
         return alerts
@@ -645,19 +679,27 @@ class AdvancedStateTracker:
         return self.horse_states.copy()
     
     def save_timeline_data(self, output_path: str, format: str = 'json'):
-        """Save timeline data to file"""
+        """Save timeline data to file, streaming one record at a time"""
         import json
         import csv
         
         if format == 'json':
-            with open(output_path, 'w') as f:
-                json.dump(self.timeline_data, f, indent=2)
+            with open(output_path, 'wb') as f:
+                f.write(b'[')
+                for i, record in enumerate(self.timeline_data):
+                    if i:
+                        f.write(b',')
+                    if HAS_ORJSON:
+                        f.write(orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY))
+                    else:
+                        f.write(json.dumps(record).encode())
+                f.write(b']')
         elif format == 'csv':
             if self.timeline_data:
-                keys = self.timeline_data[0].keys()
+                keys = tuple(self.timeline_data[0].keys())
                 with open(output_path, 'w', newline='') as f:
-                    writer = csv.DictWriter(f, fieldnames=keys)
-                    writer.writeheader()
-                    writer.writerows(self.timeline_data)
+                    writer = csv.writer(f)
+                    writer.writerow(keys)
+                    writer.writerows([record.get(k) for k in keys] for record in self.timeline_data)
         
-        logger.info(f"Timeline data saved to {output_path}")
\ No newline at end of file
+        logger.info(f"Timeline data saved to {output_path}")
@@ -1,8 +1,9 @@
 """Gait classification for horse movement patterns."""
+import math
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Dict, Optional, Tuple, Union
 from dataclasses import dataclass
-from collections import deque
 from enum import Enum
 import logging
 
@@ -10,6 +11,100 @@ from .pose_analysis import PoseMetrics, PoseAnalyzer
 
 logger = logging.getLogger(__name__)
 
+# Hoof keypoint indices, one column per leg in footfall arrays
+_LEGS = ("front_left", "front_right", "back_left", "back_right")
+_HOOF_INDICES = np.array([7, 10, 13, 16])
+_HOOF_CONF_THRESHOLD = 0.3
+_CONTACT_MOVEMENT_SQ = 2.0 ** 2  # Squared contact threshold in pixels
+_SMALL_REDUCTION_SIZE = 16  # Below this, plain Python reductions beat NumPy
+_LEG_BITS = np.array([1, 2, 4, 8], dtype=np.uint8)  # Bit per leg in packed contact codes
+
+# Head segment as (neck, nose) keypoint indices for the head direction
+_NECK_INDEX, _NOSE_INDEX = 3, 2
+_HEAD_CONF_THRESHOLD = 0.3
+_HEAD_DOWN_Y = 0.7  # Head vector y component (image y points down) for a lowered head
+
+
+def _as_contact_array(footfall_patterns: Union[Dict[str, List[bool]], np.ndarray]) -> np.ndarray:
+    """Return footfall patterns as an (N, 4) boolean array ordered as ``_LEGS``."""
+    if isinstance(footfall_patterns, np.ndarray):
+        return footfall_patterns
+    return np.column_stack([
+        np.asarray(footfall_patterns[leg], dtype=bool) for leg in _LEGS
+    ])
+
+
+def _head_direction(keypoints: np.ndarray) -> np.ndarray:
+    """Unit neck -> nose direction vector.
+    
+    The direction is independent of image scale and horse position. It is
+    NaN when either endpoint has low confidence or the segment has zero length.
+    
+    Args:
+        keypoints: Array of shape (..., 17, 3) with (x, y, confidence)
+        
+    Returns:
+        (..., 2) float32 array of unit vectors
+    """
+    neck = keypoints[..., _NECK_INDEX, :]
+    nose = keypoints[..., _NOSE_INDEX, :]
+    vectors = nose[..., :2] - neck[..., :2]
+    lengths = np.hypot(vectors[..., 0], vectors[..., 1])
+    valid = (np.minimum(neck[..., 2], nose[..., 2]) > _HEAD_CONF_THRESHOLD) & (lengths > 0)
+    
+    unit = np.full(vectors.shape, np.nan, dtype=np.float32)
+    unit[valid] = vectors[valid] / lengths[valid][..., None]
+    return unit
+
+
+def _footfall_contacts_with_gaps(keypoints: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized footfall detection over an (N, 17, 3) keypoint stack.
+    
+    A hoof is in contact when it moved less than the pixel threshold since
+    its last confident position.
+    
+    Returns:
+        Tuple of (N, 4) boolean contacts, columns ordered as ``_LEGS``, and
+        (N, 4) frame distances back to each contact's reference position
+        (0 where there is no contact)
+    """
+    n_frames = keypoints.shape[0]
+    if n_frames == 0:
+        empty = np.zeros((0, len(_LEGS)), dtype=np.int64)
+        return empty.astype(bool), empty
+    
+    hooves = keypoints[:, _HOOF_INDICES, :]
+    confident = hooves[:, :, 2] > _HOOF_CONF_THRESHOLD
+    
+    # Index of the last confident frame strictly before each frame
+    frame_idx = np.arange(n_frames)[:, None]
+    last_confident = np.where(confident, frame_idx, -1)
+    np.maximum.accumulate(last_confident, axis=0, out=last_confident)
+    prev_idx = np.empty_like(last_confident)
+    prev_idx[0] = -1
+    prev_idx[1:] = last_confident[:-1]
+    
+    prev_xy = hooves[np.maximum(prev_idx, 0), np.arange(len(_LEGS)), :2]
+    diffs = hooves[:, :, :2] - prev_xy
+    sq_movement = np.einsum('nlc,nlc->nl', diffs, diffs)
+    
+    # Hoof is in contact if movement is minimal
+    contacts = confident & (prev_idx >= 0) & (sq_movement < _CONTACT_MOVEMENT_SQ)
+    return contacts, np.where(contacts, frame_idx - prev_idx, 0)
+
+
+def _trailing_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of each trailing window of ``values`` (shorter at the start) via prefix sums."""
+    prefix = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    end = np.arange(1, values.shape[0] + 1)
+    return prefix[end] - prefix[np.maximum(end - window, 0)]
+
+
+def _nanmean_or_none(values: np.ndarray) -> Optional[float]:
+    """Mean of the non-NaN entries, or None when there are none."""
+    valid = values[~np.isnan(values)]
+    return float(valid.mean()) if valid.size else None
+
 
 class GaitType(Enum):
     """Horse gait types."""
@@ -22,6 +117,11 @@ class GaitType(Enum):
     UNKNOWN = "unknown"
 
 
+# Gait groups for action classification
+_WALKING_GAITS = frozenset({GaitType.WALK, GaitType.BACKING})
+_RUNNING_GAITS = frozenset({GaitType.TROT, GaitType.CANTER, GaitType.GALLOP})
+
+
 class ActionType(Enum):
     """Horse action/behavior types."""
     STANDING = "standing"
@@ -50,16 +150,41 @@ class GaitMetrics:
 class GaitClassifier:
     """Classify horse gaits from pose sequences."""
     
-    def __init__(self, window_size: int = 30):
+    def __init__(self, window_size: int = 30, min_confidence: float = 0.0):
         """Initialize gait classifier.
         
         Args:
             window_size: Number of frames to analyze for classification
+            min_confidence: Minimum mean pose confidence over the window;
+                classify() returns None below it without doing gait analysis
         """
         self.window_size = window_size
-        self.pose_buffer = deque(maxlen=window_size)
+        self.min_confidence = min_confidence
         self.pose_analyzer = PoseAnalyzer()
         
+        # Circular buffers over the analysis window; head is the next write slot.
+        # Keypoint math is bandwidth bound and pixel/confidence values don't
+        # need double precision, so the buffers are float32 (timestamps excepted)
+        self.kpts_buf = np.empty((window_size, 17, 3), dtype=np.float32)
+        self.ts_buf = np.empty(window_size, dtype=np.float64)
+        # Per-frame pose metrics as parallel arrays; NaN marks a missing value
+        self.vel_buf = np.full(window_size, np.nan, dtype=np.float32)
+        self.stride_buf = np.full(window_size, np.nan, dtype=np.float32)
+        self.conf_buf = np.full(window_size, np.nan, dtype=np.float32)
+        # Footfalls are detected incrementally: one packed 4-bit contact code per
+        # frame, plus how many frames back each contact's reference position was
+        self.contact_buf = np.zeros(window_size, dtype=np.uint8)
+        self.gap_buf = np.zeros((window_size, len(_LEGS)), dtype=np.int64)
+        self._last_hoof_xy = np.zeros((len(_LEGS), 2), dtype=np.float32)
+        self._last_hoof_frame = np.full(len(_LEGS), -1, dtype=np.int64)
+        self.frame_index = 0
+        # Only the newest frame's head direction is used, so no history is kept
+        self.latest_head_direction = np.full(2, np.nan, dtype=np.float32)
+        self.latest_metrics: Optional[PoseMetrics] = None
+        self.last_metrics: Optional[PoseMetrics] = None  # Latest metrics at previous classify()
+        self.head = 0
+        self.count = 0
+        
         # Gait characteristic thresholds
         self.velocity_thresholds = {
             GaitType.STANDING: 0.5,
@@ -77,124 +202,105 @@ class GaitClassifier:
             GaitType.CANTER: (2.5, 3.5),
             GaitType.GALLOP: (3.5, 5.0)
         }
+        
+        # Threshold tables are fixed after init; precompute lookup arrays once
+        sorted_velocity = sorted(self.velocity_thresholds.items(), key=lambda x: x[1])
+        self._vel_gaits = tuple(gait for gait, _ in sorted_velocity)
+        self._vel_thresh_arr = np.array([threshold for _, threshold in sorted_velocity])
+        self._freq_gaits = tuple(self.frequency_ranges)
+        self._freq_lo = np.array([lo for lo, _ in self.frequency_ranges.values()], dtype=float)
+        self._freq_hi = np.array([hi for _, hi in self.frequency_ranges.values()], dtype=float)
+        # Fallback when no range matches: gait by frequency band
+        self._freq_boundaries = np.array([0.1, 1.5, 2.5, 3.5])
+        self._freq_band_gaits = (
+            GaitType.STANDING, GaitType.WALK, GaitType.TROT, GaitType.CANTER, GaitType.GALLOP
+        )
     
-    def detect_footfall_pattern(self, 
-                                poses: List[Dict[str, np.ndarray]]) -> List[bool]:
+    def detect_footfall_pattern(self,
+                                poses: Union[List[Dict[str, np.ndarray]], np.ndarray]
+                                ) -> Dict[str, List[bool]]:
         """Detect footfall patterns from pose sequence.
         
         Args:
-            poses: List of pose dictionaries with keypoints
+            poses: List of pose dictionaries with keypoints, or an already
+                stacked (N, 17, 3) keypoint array
             
         Returns:
-            List of boolean arrays for each foot contact
+            Dictionary of boolean lists for each foot contact
         """
-        footfall_patterns = {
-            "front_left": [],
-            "front_right": [],
-            "back_left": [],
-            "back_right": []
-        }
-        
-        # Keypoint indices for hooves
-        hoof_indices = {
-            "front_left": 7,
-            "front_right": 10,
-            "back_left": 13,
-            "back_right": 16
-        }
-        
-        prev_positions = {}
-        
-        for pose in poses:
-            keypoints = pose["keypoints"]
-            
-            for leg, idx in hoof_indices.items():
-                if keypoints[idx, 2] > 0.3:  # If confident
-                    current_pos = keypoints[idx, :2]
-                    
-                    # Check if hoof is stationary (in contact with ground)
-                    if leg in prev_positions:
-                        movement = np.linalg.norm(current_pos - prev_positions[leg])
-                        # Hoof is in contact if movement is minimal
-                        is_contact = movement < 2.0  # Threshold in pixels
-                        footfall_patterns[leg].append(is_contact)
-                    else:
-                        footfall_patterns[leg].append(False)
-                    
-                    prev_positions[leg] = current_pos
-                else:
-                    footfall_patterns[leg].append(False)
+        if not isinstance(poses, np.ndarray):
+            poses = np.stack([pose["keypoints"] for pose in poses])
+        contacts = self._footfall_contacts(poses)
+        return {leg: contacts[:, i].tolist() for i, leg in enumerate(_LEGS)}
+    
+    @staticmethod
+    def _footfall_contacts(keypoints: np.ndarray) -> np.ndarray:
+        """Vectorized footfall detection over an (N, 17, 3) keypoint stack.
         
-        return footfall_patterns
+        Returns:
+            (N, 4) boolean contact array, columns ordered as ``_LEGS``
+        """
+        return _footfall_contacts_with_gaps(keypoints)[0]
     
     def calculate_stride_frequency(self, 
-                                  footfall_patterns: Dict[str, List[bool]],
+                                  footfall_patterns: Union[Dict[str, List[bool]], np.ndarray],
                                   fps: float = 30.0) -> float:
         """Calculate stride frequency from footfall patterns.
         
         Args:
-            footfall_patterns: Dictionary of foot contact patterns
+            footfall_patterns: Dictionary of foot contact patterns, or an
+                (N, 4) boolean contact array
             fps: Frames per second
             
         Returns:
             Stride frequency in steps per second
         """
-        total_steps = 0
+        contacts = _as_contact_array(footfall_patterns)
         
-        for leg, pattern in footfall_patterns.items():
-            if len(pattern) < 2:
-                continue
-            
-            # Count transitions from contact to no-contact (steps)
-            steps = 0
-            for i in range(1, len(pattern)):
-                if pattern[i-1] and not pattern[i]:  # Liftoff
-                    steps += 1
-            
-            total_steps += steps
+        # Count transitions from contact to no-contact (steps)
+        total_steps = int(np.logical_and(contacts[:-1], ~contacts[1:]).sum())
         
         # Calculate frequency
-        duration_seconds = len(list(footfall_patterns.values())[0]) / fps
+        duration_seconds = contacts.shape[0] / fps
         if duration_seconds > 0:
             return total_steps / duration_seconds
         
         return 0.0
     
     def calculate_gait_symmetry(self,
-                               footfall_patterns: Dict[str, List[bool]]) -> float:
+                               footfall_patterns: Union[Dict[str, List[bool]], np.ndarray]) -> float:
         """Calculate gait symmetry score.
         
         Args:
-            footfall_patterns: Dictionary of foot contact patterns
+            footfall_patterns: Dictionary of foot contact patterns, or an
+                (N, 4) boolean contact array
             
         Returns:
             Symmetry score (0-1)
         """
-        # Compare left vs right patterns
-        left_pattern = []
-        right_pattern = []
-        
-        if "front_left" in footfall_patterns and "back_left" in footfall_patterns:
-            left_pattern = [
-                a or b for a, b in 
-                zip(footfall_patterns["front_left"], footfall_patterns["back_left"])
-            ]
-        
-        if "front_right" in footfall_patterns and "back_right" in footfall_patterns:
-            right_pattern = [
-                a or b for a, b in
-                zip(footfall_patterns["front_right"], footfall_patterns["back_right"])
-            ]
-        
-        if len(left_pattern) == 0 or len(right_pattern) == 0:
+        if not isinstance(footfall_patterns, np.ndarray) and \
+                not all(leg in footfall_patterns for leg in _LEGS):
             return 0.0
         
-        # Calculate correlation between patterns
-        left_float = np.array(left_pattern, dtype=float)
-        right_float = np.array(right_pattern, dtype=float)
+        contacts = _as_contact_array(footfall_patterns)
+        n = contacts.shape[0]
+        if n == 0:
+            return 0.0
         
-        if np.std(left_float) > 0 and np.std(right_float) > 0:
-            correlation = np.corrcoef(left_float, right_float)[0, 1]
+        # Compare left vs right patterns
+        left = contacts[:, 0] | contacts[:, 2]
+        right = contacts[:, 1] | contacts[:, 3]
+        
+        # Pearson correlation from raw sums; for 0/1 data x*x == x so the
+        # squared sums reduce to plain counts
+        sx = int(np.count_nonzero(left))
+        sy = int(np.count_nonzero(right))
+        sxy = int(np.count_nonzero(left & right))
+        var_x = n * sx - sx * sx
+        var_y = n * sy - sy * sy
+        
+        if var_x > 0 and var_y > 0:
+            correlation = (n * sxy - sx * sy) / math.sqrt(var_x * var_y)
             # Convert correlation to 0-1 score
             symmetry = (correlation + 1) / 2
             return max(0, min(1, symmetry))
@@ -215,44 +321,42 @@ class GaitClassifier:
         """
         # Use velocity if available
         if velocity is not None:
-            for gait, threshold in sorted(
-                self.velocity_thresholds.items(), 
-                key=lambda x: x[1]
-            ):
-                if velocity < threshold:
-                    return gait
+            # First gait whose threshold exceeds the velocity
+            i = int(np.searchsorted(self._vel_thresh_arr, velocity, side='right'))
+            if i < len(self._vel_gaits):
+                return self._vel_gaits[i]
         
         # Otherwise use frequency
-        for gait, (min_freq, max_freq) in self.frequency_ranges.items():
-            if min_freq <= frequency <= max_freq:
-                return gait
+        matches = np.flatnonzero((self._freq_lo <= frequency) & (frequency <= self._freq_hi))
+        if matches.size:
+            return self._freq_gaits[matches[0]]
         
         # Default based on frequency alone
-        if frequency < 0.1:
-            return GaitType.STANDING
-        elif frequency < 1.5:
-            return GaitType.WALK
-        elif frequency < 2.5:
-            return GaitType.TROT
-        elif frequency < 3.5:
-            return GaitType.CANTER
-        else:
-            return GaitType.GALLOP
+        return self._freq_band_gaits[
+            int(np.searchsorted(self._freq_boundaries, frequency, side='right'))
+        ]
     
     def classify_action(self, 
                        pose_metrics: PoseMetrics,
-                       gait_type: GaitType) -> ActionType:
+                       gait_type: GaitType,
+                       head_direction: Optional[np.ndarray] = None) -> ActionType:
         """Classify horse action/behavior from pose.
         
         Args:
             pose_metrics: Analyzed pose metrics
             gait_type: Detected gait type
+            head_direction: Optional unit neck -> nose vector for the same frame
             
         Returns:
             Classified action type
         """
-        # Head position relative to body
-        head_low = pose_metrics.head_height > 200  # Head below threshold
+        # Head position relative to body; prefer the scale-invariant head
+        # direction and fall back to the pixel threshold when it is unknown
+        head_dir_y = float(head_direction[1]) if head_direction is not None else math.nan
+        if not math.isnan(head_dir_y):
+            head_low = head_dir_y > _HEAD_DOWN_Y  # Head pointing steeply down
+        else:
+            head_low = pose_metrics.head_height > 200  # Head below threshold
         
         # Check if lying down (low center of mass)
         if pose_metrics.center_of_mass[1] > 300:  # Low position
@@ -273,12 +377,12 @@ class GaitClassifier:
                 else:
                     return ActionType.STANDING
         
-        elif gait_type in [GaitType.WALK, GaitType.BACKING]:
+        elif gait_type in _WALKING_GAITS:
             return ActionType.WALKING
         
-        elif gait_type in [GaitType.TROT, GaitType.CANTER, GaitType.GALLOP]:
+        elif gait_type in _RUNNING_GAITS:
             # Check for playful behavior (irregular patterns)
-            if hasattr(self, 'last_metrics') and self.last_metrics:
+            if self.last_metrics is not None:
                 # Large changes in direction or speed = playing
                 if pose_metrics.velocity and self.last_metrics.velocity:
                     speed_change = abs(pose_metrics.velocity - self.last_metrics.velocity)
@@ -297,11 +401,106 @@ class GaitClassifier:
             keypoints: Array of shape (17, 3) with (x, y, confidence)
             timestamp: Timestamp of the frame
         """
-        self.pose_buffer.append({
-            "keypoints": keypoints,
-            "timestamp": timestamp,
-            "metrics": self.pose_analyzer.analyze_pose(keypoints, timestamp)
-        })
+        self.kpts_buf[self.head] = keypoints
+        self.ts_buf[self.head] = timestamp
+        self._update_footfall(self.kpts_buf[self.head, _HOOF_INDICES])
+        self.latest_head_direction = _head_direction(self.kpts_buf[self.head])
+        metrics = self.pose_analyzer.analyze_pose(keypoints, timestamp)
+        self.vel_buf[self.head] = metrics.velocity if metrics.velocity is not None else np.nan
+        self.stride_buf[self.head] = (
+            metrics.stride_length if metrics.stride_length is not None else np.nan
+        )
+        self.conf_buf[self.head] = metrics.confidence
+        self.latest_metrics = metrics
+        self.head = (self.head + 1) % self.window_size
+        self.count = min(self.count + 1, self.window_size)
+    
+    def _update_footfall(self, hooves: np.ndarray) -> None:
+        """Record the contact code for the newest frame at the write head.
+        
+        Args:
+            hooves: (4, 3) hoof keypoints of the frame, ordered as ``_LEGS``
+        """
+        confident = hooves[:, 2] > _HOOF_CONF_THRESHOLD
+        diffs = hooves[:, :2] - self._last_hoof_xy
+        contact = (
+            confident
+            & (self._last_hoof_frame >= 0)
+            & (np.einsum('lc,lc->l', diffs, diffs) < _CONTACT_MOVEMENT_SQ)
+        )
+        
+        # Masked writes only; no per-leg branches or boolean gathers
+        self.contact_buf[self.head] = np.dot(contact, _LEG_BITS)
+        self.gap_buf[self.head] = np.where(contact, self.frame_index - self._last_hoof_frame, 0)
+        
+        np.copyto(self._last_hoof_xy, hooves[:, :2], where=confident[:, None])
+        np.copyto(self._last_hoof_frame, self.frame_index, where=confident)
+        self.frame_index += 1
+    
+    def _window_contacts(self) -> np.ndarray:
+        """Unpack the buffered contact codes into an (N, 4) boolean array.
+        
+        Matches ``_footfall_contacts`` on the buffered window: a contact only
+        counts if its reference position lies inside the window.
+        """
+        codes = self._ordered_view(self.contact_buf)
+        gaps = self._ordered_view(self.gap_buf)
+        contacts = (codes[:, None] & _LEG_BITS) != 0
+        contacts &= gaps <= np.arange(self.count)[:, None]
+        return contacts
+    
+    def _ordered_view(self, buf: np.ndarray) -> np.ndarray:
+        """Return the buffered frames of ``buf`` oldest first.
+        
+        Until the buffer wraps this is a plain slice; afterwards the two
+        halves are joined around the write head.
+        """
+        if self.count < self.window_size or self.head == 0:
+            return buf[:self.count]
+        return np.concatenate((buf[self.head:], buf[:self.head]))
+    
+    @property
+    def pose_buffer(self) -> np.ndarray:
+        """Buffered keypoints, oldest first, as an (N, 17, 3) array."""
+        return self._ordered_view(self.kpts_buf)
+    
+    def _gait_statistics(self,
+                         contacts: np.ndarray,
+                         fps: float) -> Tuple[float, float, float]:
+        """Compute stride frequency, symmetry and regularity for a window.
+        
+        All three statistics are reduced from the same contact array.
+        
+        Args:
+            contacts: (N, 4) boolean contact array, columns ordered as ``_LEGS``
+            fps: Frames per second
+            
+        Returns:
+            Tuple of (stride_frequency, symmetry_score, regularity_score)
+        """
+        stride_frequency = self.calculate_stride_frequency(contacts, fps)
+        symmetry_score = self.calculate_gait_symmetry(contacts)
+        
+        # Regularity from the standard deviation of front-left stride intervals
+        regularity_score = 1.0  # Default to regular
+        contact_frames = np.flatnonzero(contacts[:, 0])
+        if contact_frames.size > 2:
+            intervals = np.diff(contact_frames)
+            if intervals.size < _SMALL_REDUCTION_SIZE:
+                # ufunc dispatch dominates on a handful of values; reduce in Python
+                values = intervals.tolist()
+                mean_interval = sum(values) / len(values)
+                std_dev = math.sqrt(
+                    sum((x - mean_interval) * (x - mean_interval) for x in values) / len(values)
+                )
+            else:
+                std_dev = intervals.std()
+                mean_interval = intervals.mean()
+            if mean_interval > 0:
+                # Normalize standard deviation
+                regularity_score = max(0, 1 - (std_dev / mean_interval))
+        
+        return stride_frequency, symmetry_score, regularity_score
     
     def classify(self, fps: float = 30.0) -> Optional[GaitMetrics]:
         """Classify gait from buffered poses.
@@ -312,65 +511,36 @@ class GaitClassifier:
         Returns:
             GaitMetrics if enough data, None otherwise
         """
-        if len(self.pose_buffer) < 10:  # Need minimum frames
+        if self.count < 10:  # Need minimum frames
             return None
         
-        # Extract footfall patterns
-        footfall_patterns = self.detect_footfall_pattern(list(self.pose_buffer))
-        
-        # Calculate metrics
-        stride_frequency = self.calculate_stride_frequency(footfall_patterns, fps)
-        symmetry_score = self.calculate_gait_symmetry(footfall_patterns)
+        # Calculate confidence based on data quality; skip poor pose data early
+        confidence = float(np.mean(self.conf_buf[:self.count]))
+        if confidence < self.min_confidence:
+            return None
         
-        # Get average velocity from pose metrics
-        velocities = [
-            p["metrics"].velocity 
-            for p in self.pose_buffer 
-            if p["metrics"].velocity is not None
-        ]
-        avg_velocity = np.mean(velocities) if velocities else None
+        # Footfall-derived metrics
+        stride_frequency, symmetry_score, regularity_score = self._gait_statistics(
+            self._window_contacts(), fps
+        )
         
-        # Get average stride length
-        stride_lengths = [
-            p["metrics"].stride_length 
-            for p in self.pose_buffer 
-            if p["metrics"].stride_length is not None
-        ]
-        avg_stride = np.mean(stride_lengths) if stride_lengths else None
+        # Get average velocity and stride length from pose metrics; the means
+        # are order independent so the unordered buffer slice is enough
+        avg_velocity = _nanmean_or_none(self.vel_buf[:self.count])
+        avg_stride = _nanmean_or_none(self.stride_buf[:self.count])
         
         # Classify gait type
         gait_type = self.classify_gait_from_pattern(stride_frequency, avg_velocity)
         
         # Classify action type
-        latest_metrics = self.pose_buffer[-1]["metrics"]
-        action_type = self.classify_action(latest_metrics, gait_type)
+        latest_metrics = self.latest_metrics
+        action_type = self.classify_action(
+            latest_metrics, gait_type, self.latest_head_direction
+        )
         
         # Store for next comparison
         self.last_metrics = latest_metrics
         
-        # Calculate regularity (standard deviation of stride intervals)
-        regularity_score = 1.0  # Default to regular
-        if len(footfall_patterns.get("front_left", [])) > 0:
-            pattern = footfall_patterns["front_left"]
-            intervals = []
-            last_contact = None
-            
-            for i, contact in enumerate(pattern):
-                if contact and last_contact is not None:
-                    intervals.append(i - last_contact)
-                if contact:
-                    last_contact = i
-            
-            if len(intervals) > 1:
-                std_dev = np.std(intervals)
-                mean_interval = np.mean(intervals)
-                if mean_interval > 0:
-                    # Normalize standard deviation
-                    regularity_score = max(0, 1 - (std_dev / mean_interval))
-        
-        # Calculate confidence based on data quality
-        confidence = np.mean([p["metrics"].confidence for p in self.pose_buffer])
-        
         return GaitMetrics(
             gait_type=gait_type,
             action_type=action_type,
@@ -381,9 +551,140 @@ class GaitClassifier:
             regularity_score=regularity_score
         )
     
+    def classify_batch(self,
+                       all_keypoints: np.ndarray,
+                       timestamps: Optional[np.ndarray] = None,
+                       fps: float = 30.0) -> List[Optional[GaitMetrics]]:
+        """Classify every sliding window of a keypoint sequence at once.
+        
+        Gives the same results as calling add_pose() and classify() for each
+        frame on a freshly reset classifier, without re-reducing every window
+        from scratch: metric means come from prefix sums and the footfall
+        statistics from one pass over sliding-window views. The classifier's
+        own buffers are left untouched.
+        
+        Args:
+            all_keypoints: Array of shape (T, 17, 3) with (x, y, confidence)
+            timestamps: Optional (T,) frame timestamps, default frame / fps
+            fps: Frames per second of the video
+            
+        Returns:
+            One entry per frame: GaitMetrics for the window ending there, or
+            None where classify() would return None
+        """
+        n_frames = len(all_keypoints)
+        if n_frames == 0:
+            return []
+        if timestamps is None:
+            timestamps = np.arange(n_frames) / fps
+        window = self.window_size
+        keypoints = np.asarray(all_keypoints, dtype=np.float32)
+        
+        # Per-frame pose metrics (independent of this classifier's history)
+        analyzer = PoseAnalyzer()
+        frame_metrics = [
+            analyzer.analyze_pose(all_keypoints[i], float(timestamps[i]))
+            for i in range(n_frames)
+        ]
+        velocities = np.array(
+            [np.nan if m.velocity is None else m.velocity for m in frame_metrics],
+            dtype=np.float32
+        )
+        strides = np.array(
+            [np.nan if m.stride_length is None else m.stride_length for m in frame_metrics],
+            dtype=np.float32
+        )
+        confidences = np.array([m.confidence for m in frame_metrics], dtype=np.float32)
+        head_directions = _head_direction(keypoints)
+        
+        # Window means of the metrics via prefix sums
+        frames_in_window = np.minimum(np.arange(1, n_frames + 1), window)
+        avg_confidence = _trailing_sums(confidences, window) / frames_in_window
+        vel_valid = ~np.isnan(velocities)
+        vel_sums = _trailing_sums(np.where(vel_valid, velocities, 0.0), window)
+        vel_counts = _trailing_sums(vel_valid, window)
+        stride_valid = ~np.isnan(strides)
+        stride_sums = _trailing_sums(np.where(stride_valid, strides, 0.0), window)
+        stride_counts = _trailing_sums(stride_valid, window)
+        
+        # Window contacts as (T, W, 4) views over front-padded contact arrays; a
+        # contact only counts if its reference position is inside the window
+        contacts, gaps = _footfall_contacts_with_gaps(keypoints)
+        pad = ((window - 1, 0), (0, 0))
+        positions = np.arange(window)
+        win = (
+            sliding_window_view(np.pad(contacts, pad), window, axis=0)
+            & (sliding_window_view(np.pad(gaps, pad), window, axis=0) <= positions)
+        ).transpose(0, 2, 1)
+        
+        # Stride frequency
+        liftoffs = np.logical_and(win[:, :-1], ~win[:, 1:]).sum(axis=(1, 2))
+        stride_frequency = liftoffs / (frames_in_window / fps)
+        
+        # Symmetry from raw sums of the left/right patterns
+        left = win[:, :, 0] | win[:, :, 2]
+        right = win[:, :, 1] | win[:, :, 3]
+        sx = left.sum(axis=1)
+        sy = right.sum(axis=1)
+        sxy = (left & right).sum(axis=1)
+        var_x = frames_in_window * sx - sx * sx
+        var_y = frames_in_window * sy - sy * sy
+        has_var = (var_x > 0) & (var_y > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = (frames_in_window * sxy - sx * sy) / np.sqrt(var_x * var_y)
+        symmetry = np.where(has_var, np.clip((correlation + 1) / 2, 0, 1), 0.5)
+        
+        # Regularity from front-left contact intervals within each window
+        front_left = win[:, :, 0]
+        last_contact = np.where(front_left, positions, -1)
+        np.maximum.accumulate(last_contact, axis=1, out=last_contact)
+        prev_contact = np.full_like(last_contact, -1)
+        prev_contact[:, 1:] = last_contact[:, :-1]
+        has_interval = front_left & (prev_contact >= 0)
+        intervals = np.where(has_interval, positions - prev_contact, 0)
+        n_intervals = has_interval.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_interval = intervals.sum(axis=1) / n_intervals
+            variance = (intervals * intervals).sum(axis=1) / n_intervals - mean_interval ** 2
+            regularity = np.maximum(0, 1 - np.sqrt(np.maximum(variance, 0)) / mean_interval)
+        regularity = np.where(n_intervals > 1, regularity, 1.0)
+        
+        # Per-window classification; last_metrics follows the sequential path
+        results: List[Optional[GaitMetrics]] = [None] * n_frames
+        saved_last_metrics = self.last_metrics
+        self.last_metrics = None
+        try:
+            for t in range(9, n_frames):  # Need minimum frames
+                confidence = float(avg_confidence[t])
+                if confidence < self.min_confidence:
+                    continue
+                
+                avg_velocity = float(vel_sums[t] / vel_counts[t]) if vel_counts[t] else None
+                avg_stride = float(stride_sums[t] / stride_counts[t]) if stride_counts[t] else None
+                
+                gait_type = self.classify_gait_from_pattern(float(stride_frequency[t]), avg_velocity)
+                action_type = self.classify_action(frame_metrics[t], gait_type, head_directions[t])
+                self.last_metrics = frame_metrics[t]
+                
+                results[t] = GaitMetrics(
+                    gait_type=gait_type,
+                    action_type=action_type,
+                    confidence=confidence,
+                    stride_frequency=float(stride_frequency[t]),
+                    stride_length=avg_stride,
+                    symmetry_score=float(symmetry[t]),
+                    regularity_score=float(regularity[t])
+                )
+        finally:
+            self.last_metrics = saved_last_metrics
+        
+        return results
+    
     def reset(self):
         """Reset the classifier buffer."""
-        self.pose_buffer.clear()
+        self.latest_metrics = None
+        self.head = 0
+        self.count = 0
+        self._last_hoof_frame.fill(-1)
         self.pose_analyzer.pose_history.clear()
-        if hasattr(self, 'last_metrics'):
-            delattr(self, 'last_metrics')
\ No newline at end of file
+        self.last_metrics = None
\ No newline at end of file
@@ -12,8 +12,9 @@ from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from enum import Enum
 import time
-from collections import deque
-import math
+from collections import Counter, deque
+from math import atan2, degrees, hypot, pi, radians
+from statistics import fmean
 
 class PrimaryBodyState(Enum):
     """Primary body states - foundation layer"""
@@ -41,7 +42,12 @@ class LegActivity(Enum):
     RESTLESS = "restless"           # Multiple legs moving irregularly
     UNKNOWN = "unknown"
 
-@dataclass
+# Enum value strings, looked up once instead of through .value on every frame
+_PRIMARY_VALUES = {state: state.value for state in PrimaryBodyState}
+_HEAD_VALUES = {position: position.value for position in HeadPosition}
+_LEG_VALUES = {activity: activity.value for activity in LegActivity}
+
+@dataclass(slots=True)
 class StateDetectionResult:
     """Complete state detection result"""
     primary_state: PrimaryBodyState
@@ -65,9 +71,9 @@ class StateDetectionResult:
     def to_dict(self) -> Dict:
         """Convert to dictionary for JSON serialization"""
         return {
-            'primary_state': self.primary_state.value,
-            'head_position': self.head_position.value,
-            'leg_activity': self.leg_activity.value,
+            'primary_state': _PRIMARY_VALUES[self.primary_state],
+            'head_position': _HEAD_VALUES[self.head_position],
+            'leg_activity': _LEG_VALUES[self.leg_activity],
             'confidence': self.confidence,
             'keypoint_quality': self.keypoint_quality,
             'state_duration': self.state_duration,
@@ -82,7 +88,16 @@ class StateDetectionResult:
             }
         }
 
-@dataclass 
+# Integer codes for PrimaryBodyState, used by the state ring buffer
+_STATE_INT = {state: i for i, state in enumerate(PrimaryBodyState)}
+_INT_STATE = tuple(PrimaryBodyState)
+_INT_STATE_VALUES = tuple(state.value for state in _INT_STATE)
+_ROLLING_INT = _STATE_INT[PrimaryBodyState.ROLLING]
+_LYING_INT = _STATE_INT[PrimaryBodyState.LYING_DOWN]
+# Number of recent states scanned for sequence-based events
+_EVENT_WINDOW = 10
+
+@dataclass(slots=True)
 class BehavioralEvent:
     """Detected behavioral event/pattern"""
     event_type: str
@@ -102,12 +117,116 @@ class BehavioralEvent:
             'state_sequence': self.state_sequence
         }
 
+@dataclass(slots=True)
+class FrameFeatures:
+    """Geometric measurements of one frame, computed once per process_pose_data call"""
+    height_ratio: Optional[float]
+    body_angle_rad: Optional[float]
+    head_angle_rad: Optional[float]
+    leg_spread: Optional[float]
+    movement_velocity: Optional[float]
+
+# Body tilt thresholds in radians (45 and 15 degrees)
+_LYING_TILT_RAD = pi / 4
+_UPRIGHT_TILT_RAD = pi / 12
+# Rolling thresholds on frame-to-frame body angle change (30 and 90 degrees)
+_ROLL_STEP_RAD = radians(30)
+_ROLL_TOTAL_RAD = radians(90)
+
+def _segment_angle_rad(keypoints: np.ndarray, start: int, end: int) -> Optional[float]:
+    """Angle in radians of the start->end segment, None if either end is below 0.3 confidence"""
+    x0, y0, c0 = keypoints[start].tolist()
+    x1, y1, c1 = keypoints[end].tolist()
+    if c0 < 0.3 or c1 < 0.3:
+        return None
+    return atan2(y1 - y0, x1 - x0)
+
+def _bbox_height(keypoints: np.ndarray) -> float:
+    """Vertical extent of keypoints above 0.3 confidence, 0 with fewer than 3"""
+    y_coords = keypoints[keypoints[:, 2] > 0.3, 1]
+    if y_coords.size < 3:
+        return 0.0
+    return float(np.ptp(y_coords))
+
+def _masked_mean_y(keypoints: np.ndarray, idx: np.ndarray, thresh: float = 0.3) -> float:
+    """Mean y of the rows in idx above thresh confidence, NaN if none are"""
+    rows = keypoints[idx]
+    mask = rows[:, 2] > thresh
+    count = np.count_nonzero(mask)
+    if count == 0:
+        return np.nan
+    return np.where(mask, rows[:, 1], 0.0).sum() / count
+
+def _height_ratio(keypoints: np.ndarray, shoulder_idx: np.ndarray,
+                  paw_idx: np.ndarray) -> Optional[float]:
+    """Shoulder-to-paw height over keypoint bbox height, in one pass over the confident rows"""
+    shoulder_y = _masked_mean_y(keypoints, shoulder_idx)
+    paw_y = _masked_mean_y(keypoints, paw_idx)
+    if np.isnan(shoulder_y) or np.isnan(paw_y):
+        return None
+    
+    valid_y = keypoints[keypoints[:, 2] > 0.3, 1]
+    if valid_y.size < 3:
+        return None
+    bbox_height = np.ptp(valid_y)
+    if bbox_height <= 0:
+        return None
+    
+    return float(abs(paw_y - shoulder_y) / bbox_height)
+
+def _paw_steps(window: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Step lengths between consecutive frames of a (T, P, 3) keypoint window,
+    and whether both ends of each step are above 0.3 confidence; both (T-1, P)
+    """
+    visible = window[:, :, 2] > 0.3
+    steps = np.diff(window[:, :, :2], axis=0)
+    return np.hypot(steps[:, :, 0], steps[:, :, 1]), visible[1:] & visible[:-1]
+
+def _pair_spread(keypoints: np.ndarray, pair_idx: np.ndarray) -> Optional[float]:
+    """Mean distance between confident (left, right) keypoint pairs"""
+    left = keypoints[pair_idx[:, 0]]
+    right = keypoints[pair_idx[:, 1]]
+    mask = (left[:, 2] > 0.3) & (right[:, 2] > 0.3)
+    if not mask.any():
+        return None
+    d = left[mask, :2] - right[mask, :2]
+    return float(np.hypot(d[:, 0], d[:, 1]).mean())
+
 class HierarchicalStateDetector:
     """
     Advanced hierarchical state detection system for horses
     Uses pose keypoints to detect multi-layered behavioral states
     """
     
+    # Keypoints are handled as (N_KP, 3) float arrays of (x, y, confidence);
+    # rows follow the standard AP10K name order. Missing keypoints are NaN
+    # with zero confidence.
+    STANDARD_NAMES = (
+        'Nose', 'L_Eye', 'R_Eye', 'Neck', 'L_Shoulder', 'R_Shoulder',
+        'L_Elbow', 'R_Elbow', 'L_F_Paw', 'R_F_Paw', 'Root_of_tail',
+        'L_Hip', 'R_Hip', 'L_Knee', 'R_Knee', 'L_B_Paw', 'R_B_Paw'
+    )
+    KP_INDEX = {name: i for i, name in enumerate(STANDARD_NAMES)}
+    N_KP = len(STANDARD_NAMES)
+    
+    # Row indices used on every frame
+    NOSE_IDX = KP_INDEX['Nose']
+    NECK_IDX = KP_INDEX['Neck']
+    L_SHOULDER_IDX = KP_INDEX['L_Shoulder']
+    R_SHOULDER_IDX = KP_INDEX['R_Shoulder']
+    SHOULDER_IDX = np.array([L_SHOULDER_IDX, R_SHOULDER_IDX])
+    PAW_IDX = np.array([
+        KP_INDEX['L_F_Paw'], KP_INDEX['R_F_Paw'], KP_INDEX['L_B_Paw'], KP_INDEX['R_B_Paw']
+    ])
+    # Left-front/right-back diagonal paw rows
+    DIAGONAL_PAW_IDX = np.array([KP_INDEX['L_F_Paw'], KP_INDEX['R_B_Paw']])
+    # Left/right paw rows for the front and back leg pairs
+    LEG_PAIR_IDX = np.array([
+        [KP_INDEX['L_F_Paw'], KP_INDEX['R_F_Paw']],
+        [KP_INDEX['L_B_Paw'], KP_INDEX['R_B_Paw']],
+    ])
+    
     def __init__(self, history_length: int = 30):
         """
         Initialize hierarchical state detector
@@ -117,13 +236,29 @@ class HierarchicalStateDetector:
         """
         self.history_length = history_length
         self.state_history: deque = deque(maxlen=history_length)
-        self.pose_history: deque = deque(maxlen=history_length)
         self.timestamp_history: deque = deque(maxlen=history_length)
         
+        # Pose keypoints and primary state codes kept in ring buffers so the
+        # sliding-window checks can index recent frames directly
+        self._pose_ring = np.full((history_length, self.N_KP, 3), np.nan)
+        self._state_ring = np.zeros(history_length, dtype=np.int8)
+        # Body angle (radians, NaN when shoulders are not visible) memoized per frame
+        self._angle_ring = np.full(history_length, np.nan)
+        self._history_head = 0
+        self._history_count = 0
+        # Per-state counts over the last _EVENT_WINDOW frames, kept in step
+        # with the state ring so event checks need no scan
+        self._event_window_counts = [0] * len(_INT_STATE)
+        
         # Current state tracking
         self.current_primary_state = PrimaryBodyState.UNKNOWN
         self.current_state_start_time = time.time()
-        self.state_confidence_accumulator = []
+        # Only the last 5 confidences feed pose stability
+        self.state_confidence_accumulator: deque = deque(maxlen=5)
+        
+        # Keypoint extractor per element type, resolved on first sight of each
+        # type so steady-state frames dispatch with one dict lookup
+        self._extractors: Dict[type, Any] = {}
         
         # Keypoint name mapping for different pose models
         self.keypoint_names = {
@@ -157,173 +292,199 @@ class HierarchicalStateDetector:
             PrimaryBodyState.UNKNOWN: list(PrimaryBodyState)
         }
         
-    def extract_keypoints_dict(self, pose_data: Dict) -> Dict[str, Dict]:
-        """Extract keypoints as dictionary for easier access"""
-        keypoints_dict = {}
+    def _recent_window(self, ring: np.ndarray, n: int) -> np.ndarray:
+        """Last n ring rows, oldest first; a view unless the window wraps (read-only use)"""
+        head = self._history_head
+        if head >= n:
+            return ring[head - n:head]
+        return np.concatenate((ring[head - n:], ring[:head]))
+    
+    def _recent_poses(self, n: int) -> np.ndarray:
+        """Last n poses from the ring buffer, oldest first, as an (n, N_KP, 3) array"""
+        return self._recent_window(self._pose_ring, n)
+    
+    def _recent_states(self, n: int) -> np.ndarray:
+        """Last n primary state codes from the ring buffer, oldest first"""
+        return self._recent_window(self._state_ring, n)
+    
+    def _push_history(self, keypoints: np.ndarray, primary_state: PrimaryBodyState,
+                      body_angle_rad: Optional[float]):
+        """Append one frame to the pose, state and body-angle ring buffers"""
+        state_code = _STATE_INT[primary_state]
+        if self._history_count >= _EVENT_WINDOW:
+            # Read the state leaving the window before its slot can be overwritten
+            leaving = self._state_ring[(self._history_head - _EVENT_WINDOW) % self.history_length]
+            self._event_window_counts[leaving] -= 1
+        self._event_window_counts[state_code] += 1
+        
+        self._pose_ring[self._history_head] = keypoints
+        self._state_ring[self._history_head] = state_code
+        self._angle_ring[self._history_head] = np.nan if body_angle_rad is None else body_angle_rad
+        self._history_head = (self._history_head + 1) % self.history_length
+        self._history_count = min(self._history_count + 1, self.history_length)
+    
+    def extract_keypoints_array(self, pose_data: Dict) -> np.ndarray:
+        """Extract keypoints as an (N_KP, 3) array of (x, y, confidence)"""
+        keypoints_array = np.full((self.N_KP, 3), np.nan)
+        keypoints_array[:, 2] = 0.0
         
         if not pose_data or not pose_data.get('keypoints'):
-            return keypoints_dict
+            return keypoints_array
             
         keypoints = pose_data['keypoints']
+        if not isinstance(keypoints, list):
+            return keypoints_array
         
-        # Handle different keypoint formats
-        if isinstance(keypoints, list) and len(keypoints) > 0:
-            if isinstance(keypoints[0], dict):
-                # Format: [{'name': 'Nose', 'x': 100, 'y': 200, 'confidence': 0.9}, ...]
-                for kp in keypoints:
-                    if 'name' in kp and 'x' in kp and 'y' in kp:
-                        keypoints_dict[kp['name']] = {
-                            'x': kp['x'],
-                            'y': kp['y'],
-                            'confidence': kp.get('confidence', 0.0)
-                        }
-            elif isinstance(keypoints[0], (list, tuple)) and len(keypoints[0]) >= 2:
-                # Format: [(x, y, confidence), ...] with predefined order
-                standard_names = list(self.keypoint_names.values())
-                for i, kp in enumerate(keypoints):
-                    if i < len(standard_names):
-                        conf = kp[2] if len(kp) > 2 else 0.0
-                        keypoints_dict[standard_names[i]] = {
-                            'x': kp[0],
-                            'y': kp[1], 
-                            'confidence': conf
-                        }
-        
-        return keypoints_dict
-    
-    def calculate_keypoint_quality(self, keypoints_dict: Dict[str, Dict]) -> float:
+        first = keypoints[0]
+        extractor = self._extractors.get(type(first))
+        if extractor is None:
+            extractor = self._select_extractor(first)
+        if extractor is not None:
+            extractor(keypoints, keypoints_array)
+        
+        return keypoints_array
+    
+    def _select_extractor(self, first_keypoint: Any):
+        """Pick and cache the extractor for a keypoint element type"""
+        if isinstance(first_keypoint, dict):
+            extractor = self._fill_from_named
+        elif isinstance(first_keypoint, (list, tuple)):
+            extractor = self._fill_from_ordered
+        else:
+            return None
+        self._extractors[type(first_keypoint)] = extractor
+        return extractor
+    
+    def _fill_from_named(self, keypoints: List[Dict], out: np.ndarray):
+        """Format: [{'name': 'Nose', 'x': 100, 'y': 200, 'confidence': 0.9}, ...]"""
+        kp_index = self.KP_INDEX
+        for kp in keypoints:
+            if 'name' in kp and 'x' in kp and 'y' in kp:
+                idx = kp_index.get(kp['name'])
+                if idx is not None:
+                    out[idx] = (kp['x'], kp['y'], kp.get('confidence', 0.0))
+    
+    def _fill_from_ordered(self, keypoints: List, out: np.ndarray):
+        """Format: [(x, y, confidence), ...] with predefined order"""
+        if len(keypoints[0]) < 2:
+            return
+        rows = keypoints[:self.N_KP]
+        try:
+            values = np.asarray(rows, dtype=float)
+        except ValueError:
+            values = None
+        
+        if values is not None and values.ndim == 2 and values.shape[1] >= 2:
+            # Uniform rows parse in one conversion
+            n_cols = min(values.shape[1], 3)
+            out[:len(rows), :n_cols] = values[:, :n_cols]
+        else:
+            # Mixed (x, y) and (x, y, confidence) rows
+            for i, kp in enumerate(rows):
+                conf = kp[2] if len(kp) > 2 else 0.0
+                out[i] = (kp[0], kp[1], conf)
+    
+    def calculate_keypoint_quality(self, keypoints: np.ndarray) -> float:
         """Calculate overall quality of keypoint detection"""
-        if not keypoints_dict:
-            return 0.0
-            
-        confidences = [kp['confidence'] for kp in keypoints_dict.values() 
-                      if kp.get('confidence', 0) > 0]
+        confidences = keypoints[:, 2]
+        detected = confidences > 0
+        n_detected = np.count_nonzero(detected)
         
-        if not confidences:
+        if n_detected == 0:
             return 0.0
             
         # Quality is average confidence with bonus for number of detected keypoints
-        avg_confidence = np.mean(confidences)
-        detection_ratio = len(confidences) / len(self.keypoint_names)
+        avg_confidence = np.where(detected, confidences, 0.0).sum() / n_detected
+        detection_ratio = n_detected / self.N_KP
         
-        return avg_confidence * 0.7 + detection_ratio * 0.3
+        return float(avg_confidence * 0.7 + detection_ratio * 0.3)
     
-    def detect_primary_body_state(self, keypoints_dict: Dict[str, Dict]) -> Tuple[PrimaryBodyState, float]:
+    def compute_frame_features(self, keypoints: np.ndarray) -> FrameFeatures:
+        """Compute all per-frame measurements against the current history"""
+        return FrameFeatures(
+            height_ratio=self._calculate_height_ratio(keypoints),
+            body_angle_rad=self._calculate_body_angle_rad(keypoints),
+            head_angle_rad=self._calculate_head_angle_rad(keypoints),
+            leg_spread=self._calculate_leg_spread(keypoints),
+            movement_velocity=self._calculate_movement_velocity(keypoints)
+        )
+    
+    def detect_primary_body_state(self, keypoints: np.ndarray,
+                                  features: Optional[FrameFeatures] = None) -> Tuple[PrimaryBodyState, float]:
         """
         Detect primary body state from keypoints
         Phase 1: Standing vs Lying (height ratio based)
         Phase 2: Walking vs Standing (motion based)  
         Phase 3: Rolling detection (rotation during lying)
         """
-        if not keypoints_dict:
-            return PrimaryBodyState.UNKNOWN, 0.0
-        
-        # Get key reference points
-        nose = keypoints_dict.get('Nose', {})
-        neck = keypoints_dict.get('Neck', {})
-        left_shoulder = keypoints_dict.get('L_Shoulder', {})
-        right_shoulder = keypoints_dict.get('R_Shoulder', {})
-        left_hip = keypoints_dict.get('L_Hip', {})
-        right_hip = keypoints_dict.get('R_Hip', {})
-        left_front_paw = keypoints_dict.get('L_F_Paw', {})
-        right_front_paw = keypoints_dict.get('R_F_Paw', {})
-        left_back_paw = keypoints_dict.get('L_B_Paw', {})
-        right_back_paw = keypoints_dict.get('R_B_Paw', {})
-        
-        # Calculate body dimensions for height ratio
-        shoulder_height = None
-        paw_level = None
-        
-        if left_shoulder.get('confidence', 0) > 0.3 and right_shoulder.get('confidence', 0) > 0.3:
-            shoulder_height = (left_shoulder['y'] + right_shoulder['y']) / 2
-        elif left_shoulder.get('confidence', 0) > 0.3:
-            shoulder_height = left_shoulder['y']
-        elif right_shoulder.get('confidence', 0) > 0.3:
-            shoulder_height = right_shoulder['y']
-        
-        # Get average paw level (ground reference)
-        paw_points = [p for p in [left_front_paw, right_front_paw, left_back_paw, right_back_paw]
-                     if p.get('confidence', 0) > 0.3]
-        if paw_points:
-            paw_level = np.mean([p['y'] for p in paw_points])
+        if features is None:
+            features = self.compute_frame_features(keypoints)
         
         # Phase 1: Standing vs Lying Detection (most reliable)
-        if shoulder_height is not None and paw_level is not None:
-            body_height = abs(paw_level - shoulder_height)
-            bbox_height = self._estimate_bbox_height(keypoints_dict)
+        height_ratio = features.height_ratio
+        if height_ratio is not None:
             
-            if bbox_height > 0:
-                height_ratio = body_height / bbox_height
+            # Standing: tall profile, shoulders well above paws
+            if height_ratio > 0.4:  # Horse is upright
+                
+                # Phase 2: Standing vs Walking (motion analysis)
+                if self._history_count >= 3:
+                    movement_detected = self._detect_movement_pattern(keypoints)
+                    if movement_detected:
+                        return PrimaryBodyState.WALKING, 0.85
                 
-                # Standing: tall profile, shoulders well above paws
-                if height_ratio > 0.4:  # Horse is upright
-                    
-                    # Phase 2: Standing vs Walking (motion analysis)
-                    if len(self.pose_history) >= 3:
-                        movement_detected = self._detect_movement_pattern(keypoints_dict)
-                        if movement_detected:
-                            return PrimaryBodyState.WALKING, 0.85
-                    
-                    return PrimaryBodyState.STANDING, 0.90
+                return PrimaryBodyState.STANDING, 0.90
+            
+            # Lying: low profile, wide bbox
+            elif height_ratio < 0.25:  
                 
-                # Lying: low profile, wide bbox
-                elif height_ratio < 0.25:  
-                    
-                    # Phase 3: Lying vs Rolling (rotation analysis)
-                    if len(self.pose_history) >= 5:
-                        rotation_detected = self._detect_rotation_pattern(keypoints_dict)
-                        if rotation_detected:
-                            return PrimaryBodyState.ROLLING, 0.80
-                    
-                    return PrimaryBodyState.LYING_DOWN, 0.85
+                # Phase 3: Lying vs Rolling (rotation analysis)
+                if self._history_count >= 5:
+                    rotation_detected = self._detect_rotation_pattern(features.body_angle_rad)
+                    if rotation_detected:
+                        return PrimaryBodyState.ROLLING, 0.80
                 
-                # Transitioning: intermediate height ratio
-                else:
-                    return PrimaryBodyState.TRANSITIONING, 0.70
+                return PrimaryBodyState.LYING_DOWN, 0.85
+            
+            # Transitioning: intermediate height ratio
+            else:
+                return PrimaryBodyState.TRANSITIONING, 0.70
         
         # Fallback: try to detect lying from body angle
-        body_angle = self._calculate_body_angle(keypoints_dict)
+        body_angle = features.body_angle_rad
         if body_angle is not None:
-            if abs(body_angle) > 45:  # Significant tilt suggests lying
+            if abs(body_angle) > _LYING_TILT_RAD:  # Significant tilt suggests lying
                 return PrimaryBodyState.LYING_DOWN, 0.60
-            elif abs(body_angle) < 15:  # Upright
+            elif abs(body_angle) < _UPRIGHT_TILT_RAD:  # Upright
                 return PrimaryBodyState.STANDING, 0.60
         
         return PrimaryBodyState.UNKNOWN, 0.0
     
-    def detect_head_position(self, keypoints_dict: Dict[str, Dict]) -> Tuple[HeadPosition, float]:
+    def detect_head_position(self, keypoints: np.ndarray) -> Tuple[HeadPosition, float]:
         """Detect head position relative to body"""
-        nose = keypoints_dict.get('Nose', {})
-        neck = keypoints_dict.get('Neck', {})
-        left_shoulder = keypoints_dict.get('L_Shoulder', {})
-        right_shoulder = keypoints_dict.get('R_Shoulder', {})
+        nose = keypoints[self.NOSE_IDX]
+        neck = keypoints[self.NECK_IDX]
+        left_shoulder = keypoints[self.L_SHOULDER_IDX]
         
-        if not (nose.get('confidence', 0) > 0.3 and neck.get('confidence', 0) > 0.3):
+        if not (nose[2] > 0.3 and neck[2] > 0.3):
             return HeadPosition.UNKNOWN, 0.0
         
         # Calculate shoulder level (body reference)
-        shoulder_y = None
-        if left_shoulder.get('confidence', 0) > 0.3 and right_shoulder.get('confidence', 0) > 0.3:
-            shoulder_y = (left_shoulder['y'] + right_shoulder['y']) / 2
-        elif left_shoulder.get('confidence', 0) > 0.3:
-            shoulder_y = left_shoulder['y']  
-        elif right_shoulder.get('confidence', 0) > 0.3:
-            shoulder_y = right_shoulder['y']
-        
-        if shoulder_y is None:
+        shoulder_y = _masked_mean_y(keypoints, self.SHOULDER_IDX)
+        if np.isnan(shoulder_y):
             return HeadPosition.UNKNOWN, 0.0
         
-        nose_y = nose['y']
-        neck_y = neck['y']
+        nose_y = nose[1]
+        neck_y = neck[1]
         
         # Head position relative to shoulders
         head_level = (nose_y + neck_y) / 2
         height_diff = shoulder_y - head_level  # Positive = head above shoulders
         
         # Check for looking back (nose behind shoulder point)
-        if left_shoulder.get('confidence', 0) > 0.3:
-            shoulder_x = left_shoulder['x']
-            if abs(nose['x'] - shoulder_x) < 50 and nose['x'] < shoulder_x:  # Nose near/behind shoulder
+        if left_shoulder[2] > 0.3:
+            shoulder_x = left_shoulder[0]
+            if abs(nose[0] - shoulder_x) < 50 and nose[0] < shoulder_x:  # Nose near/behind shoulder
                 return HeadPosition.LOOKING_BACK, 0.80
         
         # Vertical head position
@@ -334,34 +495,30 @@ class HierarchicalStateDetector:
         else:
             return HeadPosition.NORMAL, 0.75
     
-    def detect_leg_activity(self, keypoints_dict: Dict[str, Dict]) -> Tuple[LegActivity, float]:
+    def detect_leg_activity(self, keypoints: np.ndarray) -> Tuple[LegActivity, float]:
         """Detect leg movement patterns"""
-        if len(self.pose_history) < 5:
+        if self._history_count < 5:
             return LegActivity.UNKNOWN, 0.0
         
         # Get paw positions for movement analysis
-        current_paws = self._get_paw_positions(keypoints_dict)
-        if len(current_paws) < 2:
+        current_paws = keypoints[self.PAW_IDX]
+        current_valid = current_paws[:, 2] > 0.3
+        if np.count_nonzero(current_valid) < 2:
             return LegActivity.UNKNOWN, 0.0
         
-        # Analyze movement over recent frames
-        recent_poses = list(self.pose_history)[-5:]
-        movement_vectors = []
+        # Analyze movement over recent frames, (5, 4, 3) paw rows
+        recent_poses = self._recent_poses(5)
+        past_paws = recent_poses[:, self.PAW_IDX]
+        past_valid = past_paws[:, :, 2] > 0.3
+        # Frames with fewer than two visible paws are skipped
+        past_valid &= (np.count_nonzero(past_valid, axis=1) >= 2)[:, None]
         
-        for i, past_pose in enumerate(recent_poses):
-            past_keypoints = self.extract_keypoints_dict(past_pose)
-            past_paws = self._get_paw_positions(past_keypoints)
-            
-            if len(past_paws) >= 2:
-                # Calculate movement for each paw
-                for paw_name in current_paws:
-                    if paw_name in past_paws:
-                        current_pos = current_paws[paw_name]
-                        past_pos = past_paws[paw_name]
-                        movement = np.array(current_pos) - np.array(past_pos)
-                        movement_vectors.append(np.linalg.norm(movement))
-        
-        if not movement_vectors:
+        mask = past_valid & current_valid
+        movement_vectors = np.hypot(
+            past_paws[:, :, 0] - current_paws[:, 0], past_paws[:, :, 1] - current_paws[:, 1]
+        )[mask]
+        
+        if movement_vectors.size == 0:
             return LegActivity.STATIC, 0.70
         
         avg_movement = np.mean(movement_vectors)
@@ -381,7 +538,7 @@ class HierarchicalStateDetector:
             alternating = self._detect_alternating_pattern(recent_poses)
             if alternating:
                 return LegActivity.WALKING_PATTERN, 0.80
-        elif max_movement > 15 and len(set(movement_vectors)) == 1:  # Single leg repetitive
+        elif max_movement > 15 and np.unique(movement_vectors).size == 1:  # Single leg repetitive
             return LegActivity.PAWING, 0.75
         
         return LegActivity.UNKNOWN, 0.0
@@ -397,16 +554,17 @@ class HierarchicalStateDetector:
         """
         events = []
         
-        if len(self.state_history) < 10:
+        if self._history_count < _EVENT_WINDOW:
             return events
         
-        # Get recent state sequence
-        recent_states = list(self.state_history)[-10:]
+        primary_state = state_result.primary_state
+        head_position = state_result.head_position
+        leg_activity = state_result.leg_activity
         
         # Pattern 1: Colic - State combination
-        if (state_result.primary_state == PrimaryBodyState.STANDING and
-            state_result.head_position == HeadPosition.LOOKING_BACK and
-            state_result.leg_activity == LegActivity.PAWING):
+        if (leg_activity == LegActivity.PAWING and
+            head_position == HeadPosition.LOOKING_BACK and
+            primary_state == PrimaryBodyState.STANDING):
             
             events.append(BehavioralEvent(
                 event_type="colic",
@@ -418,25 +576,25 @@ class HierarchicalStateDetector:
             ))
         
         # Pattern 2: Colic - Rolling sequence  
-        rolling_count = sum(1 for s in recent_states if s.primary_state == PrimaryBodyState.ROLLING)
-        lying_count = sum(1 for s in recent_states if s.primary_state == PrimaryBodyState.LYING_DOWN)
-        
-        if rolling_count >= 3 and lying_count >= 2:
-            # Check for Lying→Rolling→Standing pattern
-            state_sequence = [s.primary_state.value for s in recent_states]
-            if "lying_down" in state_sequence and "rolling" in state_sequence:
-                events.append(BehavioralEvent(
-                    event_type="colic",
-                    severity="critical", 
-                    confidence=0.90,
-                    duration=len(recent_states) * 0.33,  # Assume ~30fps
-                    description="Repeated lying and rolling behavior - severe colic indicator",
-                    state_sequence=state_sequence
-                ))
+        # Counts are maintained incrementally; the sequence is only read
+        # back when the pattern fires. Both counts being non-zero already
+        # means it contains lying and rolling.
+        if (self._event_window_counts[_ROLLING_INT] >= 3 and
+            self._event_window_counts[_LYING_INT] >= 2):
+            recent_states = self._recent_states(_EVENT_WINDOW)
+            state_sequence = [_INT_STATE_VALUES[code] for code in recent_states]
+            events.append(BehavioralEvent(
+                event_type="colic",
+                severity="critical", 
+                confidence=0.90,
+                duration=len(recent_states) * 0.33,  # Assume ~30fps
+                description="Repeated lying and rolling behavior - severe colic indicator",
+                state_sequence=state_sequence
+            ))
         
         # Pattern 3: General distress
-        if (state_result.head_position == HeadPosition.UP_ALERT and
-            state_result.leg_activity in [LegActivity.RESTLESS, LegActivity.PAWING]):
+        if (head_position == HeadPosition.UP_ALERT and
+            leg_activity in (LegActivity.RESTLESS, LegActivity.PAWING)):
             
             events.append(BehavioralEvent(
                 event_type="distress",
@@ -444,14 +602,14 @@ class HierarchicalStateDetector:
                 confidence=0.70,
                 duration=state_result.state_duration,
                 description="Alert posture with restless movement - possible distress",
-                state_sequence=["up_alert", state_result.leg_activity.value]
+                state_sequence=["up_alert", _LEG_VALUES[leg_activity]]
             ))
         
         # Pattern 4: Normal grazing
-        if (state_result.primary_state == PrimaryBodyState.STANDING and
-            state_result.head_position == HeadPosition.DOWN_GRAZING and
-            state_result.leg_activity == LegActivity.STATIC and
-            state_result.state_duration > 10):
+        if (state_result.state_duration > 10 and
+            head_position == HeadPosition.DOWN_GRAZING and
+            primary_state == PrimaryBodyState.STANDING and
+            leg_activity == LegActivity.STATIC):
             
             events.append(BehavioralEvent(
                 event_type="grazing",
@@ -463,7 +621,7 @@ class HierarchicalStateDetector:
             ))
         
         # Pattern 5: Unusual lying duration
-        if (state_result.primary_state == PrimaryBodyState.LYING_DOWN and 
+        if (primary_state == PrimaryBodyState.LYING_DOWN and 
             state_result.state_duration > 600):  # 10 minutes
             
             events.append(BehavioralEvent(
@@ -492,15 +650,128 @@ class HierarchicalStateDetector:
             timestamp = time.time()
         
         # Extract keypoints
-        keypoints_dict = self.extract_keypoints_dict(pose_data)
-        keypoint_quality = self.calculate_keypoint_quality(keypoints_dict)
+        keypoints = self.extract_keypoints_array(pose_data)
+        keypoint_quality = self.calculate_keypoint_quality(keypoints)
+        features = self.compute_frame_features(keypoints)
         
+        return self._process_frame(keypoints, keypoint_quality, features, timestamp)
+    
+    def process_pose_batch(self, poses: np.ndarray, timestamps: Optional[List[float]] = None,
+                           fps: float = 30.0) -> List[Tuple[StateDetectionResult, List[BehavioralEvent]]]:
+        """
+        Process a block of consecutive frames, e.g. for offline video analysis
+        
+        Per-frame geometry is computed for all frames at once; the temporal
+        part (history windows, state durations, events) then runs frame by
+        frame, giving the same results as calling process_pose_data in order.
+        
+        Args:
+            poses: (F, N_KP, 3) array of (x, y, confidence) in STANDARD_NAMES order
+            timestamps: Optional per-frame timestamps, spaced 1/fps from now if None
+            fps: Frame rate used when timestamps are not given
+            
+        Returns:
+            List of (StateDetectionResult, List[BehavioralEvent]) per frame
+        """
+        poses = np.asarray(poses, dtype=float)
+        if poses.ndim != 3 or poses.shape[1:] != (self.N_KP, 3):
+            raise ValueError(f"poses must have shape (F, {self.N_KP}, 3), got {poses.shape}")
+        
+        n_frames = len(poses)
+        if timestamps is None:
+            start = time.time()
+            timestamps = [start + i / fps for i in range(n_frames)]
+        elif len(timestamps) != n_frames:
+            raise ValueError("timestamps must have one entry per frame")
+        
+        qualities, features = self.compute_batch_features(poses)
+        return [
+            self._process_frame(poses[i], qualities[i], features[i], timestamps[i])
+            for i in range(n_frames)
+        ]
+    
+    def compute_batch_features(self, poses: np.ndarray) -> Tuple[List[float], List[FrameFeatures]]:
+        """
+        Keypoint quality and FrameFeatures for an (F, N_KP, 3) block of frames
+        that directly follows the current history
+        """
+        n_frames = len(poses)
+        if n_frames == 0:
+            return [], []
+        x = poses[:, :, 0]
+        y = poses[:, :, 1]
+        conf = poses[:, :, 2]
+        valid = conf > 0.3
+        
+        # Keypoint quality
+        detected = conf > 0
+        n_detected = np.count_nonzero(detected, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_confidence = np.where(detected, conf, 0.0).sum(axis=1) / n_detected
+            qualities = np.where(n_detected > 0,
+                                 avg_confidence * 0.7 + n_detected / self.N_KP * 0.3, 0.0)
+            
+            # Height ratio: shoulder/paw levels over the confident bbox height
+            def masked_mean_y(idx):
+                mask = valid[:, idx]
+                return np.where(mask, y[:, idx], 0.0).sum(axis=1) / np.count_nonzero(mask, axis=1)
+            
+            shoulder_y = masked_mean_y(self.SHOULDER_IDX)
+            paw_y = masked_mean_y(self.PAW_IDX)
+            bbox_height = (np.where(valid, y, -np.inf).max(axis=1) -
+                           np.where(valid, y, np.inf).min(axis=1))
+            ratio_ok = (~np.isnan(shoulder_y) & ~np.isnan(paw_y) &
+                        (np.count_nonzero(valid, axis=1) >= 3) & (bbox_height > 0))
+            height_ratio = np.where(ratio_ok, np.abs(paw_y - shoulder_y) / bbox_height, np.nan)
+            
+            # Body and head angles, rejected below 0.3 confidence like _segment_angle_rad
+            def segment_angle(start, end):
+                angle = np.arctan2(y[:, end] - y[:, start], x[:, end] - x[:, start])
+                return np.where((conf[:, start] >= 0.3) & (conf[:, end] >= 0.3), angle, np.nan)
+            
+            body_angle = segment_angle(self.L_SHOULDER_IDX, self.R_SHOULDER_IDX)
+            head_angle = segment_angle(self.NECK_IDX, self.NOSE_IDX)
+            
+            # Leg spread over the front and back paw pairs
+            left = poses[:, self.LEG_PAIR_IDX[:, 0]]
+            right = poses[:, self.LEG_PAIR_IDX[:, 1]]
+            pair_mask = (left[:, :, 2] > 0.3) & (right[:, :, 2] > 0.3)
+            spread = np.hypot(left[:, :, 0] - right[:, :, 0], left[:, :, 1] - right[:, :, 1])
+            leg_spread = (np.where(pair_mask, spread, 0.0).sum(axis=1) /
+                          np.count_nonzero(pair_mask, axis=1))
+            
+            # Movement velocity against the previous frame, which for the first
+            # frame is the newest history entry
+            prev = np.empty_like(poses)
+            prev[0] = self._pose_ring[self._history_head - 1]
+            prev[1:] = poses[:-1]
+            move_mask = valid & (prev[:, :, 2] > 0.3)
+            movement = np.hypot(x - prev[:, :, 0], y - prev[:, :, 1])
+            velocity = (np.where(move_mask, movement, 0.0).sum(axis=1) /
+                        np.count_nonzero(move_mask, axis=1))
+            history_before = np.minimum(self._history_count + np.arange(n_frames), self.history_length)
+            velocity[history_before < 2] = np.nan
+        
+        def optional(values):
+            return [None if np.isnan(v) else v for v in values.tolist()]
+        
+        features = [
+            FrameFeatures(*values) for values in zip(
+                optional(height_ratio), optional(body_angle), optional(head_angle),
+                optional(leg_spread), optional(velocity)
+            )
+        ]
+        return qualities.tolist(), features
+    
+    def _process_frame(self, keypoints: np.ndarray, keypoint_quality: float,
+                       features: FrameFeatures, timestamp: float) -> Tuple[StateDetectionResult, List[BehavioralEvent]]:
+        """Temporal part of the pipeline for one parsed frame; appends it to history"""
         # Primary state detection
-        primary_state, primary_confidence = self.detect_primary_body_state(keypoints_dict)
+        primary_state, primary_confidence = self.detect_primary_body_state(keypoints, features)
         
         # Secondary state detection
-        head_position, head_confidence = self.detect_head_position(keypoints_dict)
-        leg_activity, leg_confidence = self.detect_leg_activity(keypoints_dict)
+        head_position, head_confidence = self.detect_head_position(keypoints)
+        leg_activity, leg_confidence = self.detect_leg_activity(keypoints)
         
         # Calculate overall confidence
         overall_confidence = (primary_confidence * 0.6 + 
@@ -511,21 +782,16 @@ class HierarchicalStateDetector:
         if primary_state != self.current_primary_state:
             self.current_primary_state = primary_state
             self.current_state_start_time = timestamp
-            self.state_confidence_accumulator = [overall_confidence]
+            self.state_confidence_accumulator.clear()
+            self.state_confidence_accumulator.append(overall_confidence)
         else:
             self.state_confidence_accumulator.append(overall_confidence)
         
         state_duration = timestamp - self.current_state_start_time
         
         # Transition probability (how likely to change state)
-        transition_prob = self._calculate_transition_probability(primary_state, keypoints_dict)
-        
-        # Calculate additional measurements
-        height_ratio = self._calculate_height_ratio(keypoints_dict)
-        body_angle = self._calculate_body_angle(keypoints_dict)
-        head_angle = self._calculate_head_angle(keypoints_dict)
-        leg_spread = self._calculate_leg_spread(keypoints_dict)
-        movement_velocity = self._calculate_movement_velocity(keypoints_dict)
+        transition_prob = self._calculate_transition_probability(primary_state, features.height_ratio)
+        
         pose_stability = self._calculate_pose_stability()
         
         # Create result
@@ -537,11 +803,11 @@ class HierarchicalStateDetector:
             keypoint_quality=keypoint_quality,
             state_duration=state_duration,
             transition_probability=transition_prob,
-            height_ratio=height_ratio or 0.0,
-            body_angle=body_angle or 0.0,
-            head_angle=head_angle or 0.0,
-            leg_spread=leg_spread or 0.0,
-            movement_velocity=movement_velocity or 0.0,
+            height_ratio=features.height_ratio or 0.0,
+            body_angle=degrees(features.body_angle_rad) if features.body_angle_rad is not None else 0.0,
+            head_angle=degrees(features.head_angle_rad) if features.head_angle_rad is not None else 0.0,
+            leg_spread=features.leg_spread or 0.0,
+            movement_velocity=features.movement_velocity or 0.0,
             pose_stability=pose_stability
         )
         
@@ -550,145 +816,67 @@ class HierarchicalStateDetector:
         
         # Update history
         self.state_history.append(state_result)
-        self.pose_history.append(pose_data)
+        self._push_history(keypoints, primary_state, features.body_angle_rad)
         self.timestamp_history.append(timestamp)
         
         return state_result, behavioral_events
     
     # Helper methods for geometric calculations
     
-    def _estimate_bbox_height(self, keypoints_dict: Dict[str, Dict]) -> float:
+    def _estimate_bbox_height(self, keypoints: np.ndarray) -> float:
         """Estimate bounding box height from keypoints"""
-        valid_keypoints = [(kp['x'], kp['y']) for kp in keypoints_dict.values() 
-                          if kp.get('confidence', 0) > 0.3]
-        if len(valid_keypoints) < 3:
-            return 0.0
-        
-        y_coords = [kp[1] for kp in valid_keypoints]
-        return max(y_coords) - min(y_coords)
+        return _bbox_height(keypoints)
     
-    def _calculate_height_ratio(self, keypoints_dict: Dict[str, Dict]) -> Optional[float]:
+    def _calculate_height_ratio(self, keypoints: np.ndarray) -> Optional[float]:
         """Calculate body height to bbox height ratio"""
-        # Get shoulder and paw levels
-        shoulders = [keypoints_dict.get('L_Shoulder', {}), keypoints_dict.get('R_Shoulder', {})]
-        paws = [keypoints_dict.get('L_F_Paw', {}), keypoints_dict.get('R_F_Paw', {}),
-               keypoints_dict.get('L_B_Paw', {}), keypoints_dict.get('R_B_Paw', {})]
-        
-        valid_shoulders = [s for s in shoulders if s.get('confidence', 0) > 0.3]
-        valid_paws = [p for p in paws if p.get('confidence', 0) > 0.3]
-        
-        if not valid_shoulders or not valid_paws:
-            return None
-        
-        shoulder_level = np.mean([s['y'] for s in valid_shoulders])
-        paw_level = np.mean([p['y'] for p in valid_paws])
-        body_height = abs(shoulder_level - paw_level)
-        
-        bbox_height = self._estimate_bbox_height(keypoints_dict)
-        
-        return body_height / bbox_height if bbox_height > 0 else None
+        return _height_ratio(keypoints, self.SHOULDER_IDX, self.PAW_IDX)
     
-    def _calculate_body_angle(self, keypoints_dict: Dict[str, Dict]) -> Optional[float]:
-        """Calculate body tilt angle in degrees"""
-        left_shoulder = keypoints_dict.get('L_Shoulder', {})
-        right_shoulder = keypoints_dict.get('R_Shoulder', {})
-        
-        if (left_shoulder.get('confidence', 0) < 0.3 or 
-            right_shoulder.get('confidence', 0) < 0.3):
-            return None
-        
-        dx = right_shoulder['x'] - left_shoulder['x']
-        dy = right_shoulder['y'] - left_shoulder['y']
-        
-        angle_rad = math.atan2(dy, dx)
-        angle_deg = math.degrees(angle_rad)
-        
-        return angle_deg
+    def _calculate_body_angle_rad(self, keypoints: np.ndarray) -> Optional[float]:
+        """Calculate body tilt angle in radians"""
+        return _segment_angle_rad(keypoints, self.L_SHOULDER_IDX, self.R_SHOULDER_IDX)
     
-    def _calculate_head_angle(self, keypoints_dict: Dict[str, Dict]) -> Optional[float]:
-        """Calculate head angle relative to neck"""
-        nose = keypoints_dict.get('Nose', {})
-        neck = keypoints_dict.get('Neck', {})
-        
-        if (nose.get('confidence', 0) < 0.3 or neck.get('confidence', 0) < 0.3):
-            return None
-        
-        dx = nose['x'] - neck['x']
-        dy = nose['y'] - neck['y']
-        
-        angle_rad = math.atan2(dy, dx)
-        angle_deg = math.degrees(angle_rad)
-        
-        return angle_deg
+    def _calculate_head_angle_rad(self, keypoints: np.ndarray) -> Optional[float]:
+        """Calculate head angle relative to neck in radians"""
+        return _segment_angle_rad(keypoints, self.NECK_IDX, self.NOSE_IDX)
     
-    def _calculate_leg_spread(self, keypoints_dict: Dict[str, Dict]) -> Optional[float]:
+    def _calculate_leg_spread(self, keypoints: np.ndarray) -> Optional[float]:
         """Calculate average distance between left and right legs"""
-        leg_pairs = [
-            ('L_F_Paw', 'R_F_Paw'),  # Front legs
-            ('L_B_Paw', 'R_B_Paw'),  # Back legs
-        ]
-        
-        spreads = []
-        for left_name, right_name in leg_pairs:
-            left_paw = keypoints_dict.get(left_name, {})
-            right_paw = keypoints_dict.get(right_name, {})
-            
-            if (left_paw.get('confidence', 0) > 0.3 and 
-                right_paw.get('confidence', 0) > 0.3):
-                
-                distance = math.sqrt(
-                    (left_paw['x'] - right_paw['x'])**2 + 
-                    (left_paw['y'] - right_paw['y'])**2
-                )
-                spreads.append(distance)
-        
-        return np.mean(spreads) if spreads else None
+        return _pair_spread(keypoints, self.LEG_PAIR_IDX)
     
-    def _calculate_movement_velocity(self, keypoints_dict: Dict[str, Dict]) -> Optional[float]:
+    def _calculate_movement_velocity(self, keypoints: np.ndarray) -> Optional[float]:
         """Calculate average keypoint movement velocity"""
-        if len(self.pose_history) < 2:
+        if self._history_count < 2:
             return None
         
-        prev_pose = self.pose_history[-1]
-        prev_keypoints = self.extract_keypoints_dict(prev_pose)
-        
-        movements = []
-        for kp_name in keypoints_dict:
-            if (kp_name in prev_keypoints and 
-                keypoints_dict[kp_name].get('confidence', 0) > 0.3 and
-                prev_keypoints[kp_name].get('confidence', 0) > 0.3):
-                
-                dx = keypoints_dict[kp_name]['x'] - prev_keypoints[kp_name]['x']
-                dy = keypoints_dict[kp_name]['y'] - prev_keypoints[kp_name]['y']
-                movement = math.sqrt(dx*dx + dy*dy)
-                movements.append(movement)
+        prev_keypoints = self._pose_ring[self._history_head - 1]
+        mask = (keypoints[:, 2] > 0.3) & (prev_keypoints[:, 2] > 0.3)
+        if not mask.any():
+            return None
         
-        return np.mean(movements) if movements else None
+        d = keypoints[mask, :2] - prev_keypoints[mask, :2]
+        return np.hypot(d[:, 0], d[:, 1]).mean()
     
     def _calculate_pose_stability(self) -> float:
         """Calculate how stable the pose detection is over time"""
         if len(self.state_confidence_accumulator) < 3:
             return 0.5
         
-        recent_confidences = self.state_confidence_accumulator[-5:]
-        return 1.0 - np.std(recent_confidences)  # Lower std = higher stability
+        return 1.0 - np.std(self.state_confidence_accumulator)  # Lower std = higher stability
     
     def _calculate_transition_probability(self, current_state: PrimaryBodyState, 
-                                        keypoints_dict: Dict[str, Dict]) -> float:
+                                        height_ratio: Optional[float]) -> float:
         """Calculate probability of transitioning to a different state"""
-        if len(self.state_history) < 5:
+        if self._history_count < 5:
             return 0.0
         
         # Check state stability
-        recent_states = [s.primary_state for s in list(self.state_history)[-5:]]
-        state_changes = sum(1 for i in range(1, len(recent_states)) 
-                          if recent_states[i] != recent_states[i-1])
+        recent_states = self._recent_states(5)
+        state_changes = np.count_nonzero(recent_states[1:] != recent_states[:-1])
         
         # High rate of change indicates instability
         change_rate = state_changes / (len(recent_states) - 1)
         
         # Check if current measurements are at boundary conditions
-        height_ratio = self._calculate_height_ratio(keypoints_dict)
         boundary_score = 0.0
         
         if height_ratio:
@@ -702,120 +890,69 @@ class HierarchicalStateDetector:
         transition_prob = min(1.0, change_rate * 0.5 + boundary_score)
         return transition_prob
     
-    def _detect_movement_pattern(self, keypoints_dict: Dict[str, Dict]) -> bool:
+    def _detect_movement_pattern(self, keypoints: np.ndarray) -> bool:
         """Detect if horse is walking based on leg movement patterns"""
-        if len(self.pose_history) < 3:
+        if self._history_count < 3:
             return False
         
-        # Get paw positions over recent frames
-        recent_paw_positions = []
-        for pose in list(self.pose_history)[-3:]:
-            kp_dict = self.extract_keypoints_dict(pose)
-            paw_pos = self._get_paw_positions(kp_dict)
-            recent_paw_positions.append(paw_pos)
-        
-        # Add current frame
-        current_paws = self._get_paw_positions(keypoints_dict)
-        recent_paw_positions.append(current_paws)
-        
-        # Check for alternating movement pattern
-        movement_detected = False
-        for paw_name in ['L_F_Paw', 'R_F_Paw', 'L_B_Paw', 'R_B_Paw']:
-            movements = []
-            for i in range(1, len(recent_paw_positions)):
-                if (paw_name in recent_paw_positions[i-1] and 
-                    paw_name in recent_paw_positions[i]):
-                    
-                    prev_pos = recent_paw_positions[i-1][paw_name]
-                    curr_pos = recent_paw_positions[i][paw_name]
-                    movement = math.sqrt(
-                        (curr_pos[0] - prev_pos[0])**2 + 
-                        (curr_pos[1] - prev_pos[1])**2
-                    )
-                    movements.append(movement)
-            
-            if movements and np.mean(movements) > 8:  # Significant movement
-                movement_detected = True
-                break
+        # Paw rows over the last 3 frames plus the current one, (4, 4, 3)
+        window = self._paw_window(keypoints, 3)
+        
+        # Per-paw movement between consecutive frames where both ends are visible
+        movements, step_valid = _paw_steps(window)
+        counts = np.count_nonzero(step_valid, axis=0)
+        mean_movement = np.where(step_valid, movements, 0.0).sum(axis=0) / np.maximum(counts, 1)
         
-        return movement_detected
+        # Significant movement on any paw
+        return bool(np.any((counts > 0) & (mean_movement > 8)))
     
-    def _detect_rotation_pattern(self, keypoints_dict: Dict[str, Dict]) -> bool:
-        """Detect rotation during lying (rolling behavior)"""
-        if len(self.pose_history) < 5:
+    def _detect_rotation_pattern(self, body_angle_rad: Optional[float]) -> bool:
+        """Detect rotation during lying (rolling behavior) from the current body angle"""
+        if self._history_count < 5:
             return False
         
-        # Check body angle changes over time
-        angles = []
-        for pose in list(self.pose_history)[-5:]:
-            kp_dict = self.extract_keypoints_dict(pose)
-            angle = self._calculate_body_angle(kp_dict)
-            if angle is not None:
-                angles.append(angle)
+        # Body angles memoized for the last 5 frames plus the current one;
+        # frames without both shoulders visible are NaN and skipped
+        angles = np.empty(6)
+        angles[:5] = self._recent_window(self._angle_ring, 5)
+        angles[5] = np.nan if body_angle_rad is None else body_angle_rad
+        angles = angles[~np.isnan(angles)]
         
-        # Add current angle
-        current_angle = self._calculate_body_angle(keypoints_dict)
-        if current_angle is not None:
-            angles.append(current_angle)
-        
-        if len(angles) < 3:
+        if angles.size < 3:
             return False
         
         # Check for significant angle changes (rotation)
-        angle_changes = [abs(angles[i] - angles[i-1]) for i in range(1, len(angles))]
-        max_change = max(angle_changes)
-        total_change = sum(angle_changes)
+        angle_changes = np.abs(np.diff(angles))
+        max_change = angle_changes.max()
+        total_change = angle_changes.sum()
         
         # Rolling detected if large angle changes
-        return max_change > 30 or total_change > 90
+        return bool(max_change > _ROLL_STEP_RAD or total_change > _ROLL_TOTAL_RAD)
     
-    def _get_paw_positions(self, keypoints_dict: Dict[str, Dict]) -> Dict[str, Tuple[float, float]]:
-        """Extract paw positions for movement analysis"""
-        paw_positions = {}
-        paw_names = ['L_F_Paw', 'R_F_Paw', 'L_B_Paw', 'R_B_Paw']
-        
-        for paw_name in paw_names:
-            paw = keypoints_dict.get(paw_name, {})
-            if paw.get('confidence', 0) > 0.3:
-                paw_positions[paw_name] = (paw['x'], paw['y'])
-        
-        return paw_positions
+    def _paw_window(self, keypoints: np.ndarray, n_past: int) -> np.ndarray:
+        """Paw rows of the last n_past history frames followed by the current frame"""
+        window = np.empty((n_past + 1, len(self.PAW_IDX), 3))
+        window[:n_past] = self._recent_poses(n_past)[:, self.PAW_IDX]
+        window[n_past] = keypoints[self.PAW_IDX]
+        return window
     
-    def _detect_alternating_pattern(self, recent_poses: List[Dict]) -> bool:
+    def _detect_alternating_pattern(self, recent_poses: List[np.ndarray]) -> bool:
         """Detect alternating leg movement pattern (walking gait)"""
         if len(recent_poses) < 4:
             return False
         
         # Analyze diagonal pairs: L_F_Paw+R_B_Paw vs R_F_Paw+L_B_Paw
-        diagonal_movements = []
+        diagonal = np.asarray(recent_poses)[:, self.DIAGONAL_PAW_IDX]
+        movements, step_valid = _paw_steps(diagonal)
         
-        for i in range(1, len(recent_poses)):
-            prev_kp = self.extract_keypoints_dict(recent_poses[i-1])
-            curr_kp = self.extract_keypoints_dict(recent_poses[i])
-            
-            # Check diagonal pair 1: Left front + Right back
-            lf_movement = rb_movement = 0
-            if ('L_F_Paw' in prev_kp and 'L_F_Paw' in curr_kp and 
-                prev_kp['L_F_Paw'].get('confidence', 0) > 0.3 and
-                curr_kp['L_F_Paw'].get('confidence', 0) > 0.3):
-                lf_movement = math.sqrt(
-                    (curr_kp['L_F_Paw']['x'] - prev_kp['L_F_Paw']['x'])**2 +
-                    (curr_kp['L_F_Paw']['y'] - prev_kp['L_F_Paw']['y'])**2
-                )
-            
-            if ('R_B_Paw' in prev_kp and 'R_B_Paw' in curr_kp and 
-                prev_kp['R_B_Paw'].get('confidence', 0) > 0.3 and
-                curr_kp['R_B_Paw'].get('confidence', 0) > 0.3):
-                rb_movement = math.sqrt(
-                    (curr_kp['R_B_Paw']['x'] - prev_kp['R_B_Paw']['x'])**2 +
-                    (curr_kp['R_B_Paw']['y'] - prev_kp['R_B_Paw']['y'])**2
-                )
-            
-            diagonal1_movement = (lf_movement + rb_movement) / 2
-            diagonal_movements.append(diagonal1_movement)
+        # Diagonal pair 1: Left front + Right back, paws not visible at both
+        # ends of a step count as not moving
+        movements = np.where(step_valid, movements, 0.0)
+        diagonal_movements = (movements[:, 0] + movements[:, 1]) / 2
         
         # Simple alternating pattern detection
-        return len(diagonal_movements) >= 2 and np.mean(diagonal_movements) > 5
+        return bool(diagonal_movements.size >= 2 and
+                    diagonal_movements.sum() / diagonal_movements.size > 5)
     
     def get_state_summary(self) -> Dict:
         """Get summary of current state and recent history"""
@@ -826,16 +963,13 @@ class HierarchicalStateDetector:
         
         # Calculate state distribution over recent history
         recent_states = list(self.state_history)[-20:]  # Last 20 detections
-        state_counts = {}
-        for state_result in recent_states:
-            state_name = state_result.primary_state.value
-            state_counts[state_name] = state_counts.get(state_name, 0) + 1
+        state_counts = Counter(_PRIMARY_VALUES[s.primary_state] for s in recent_states)
         
         return {
             "current_state": current_state.to_dict(),
             "state_distribution": state_counts,
             "total_detections": len(self.state_history),
-            "average_confidence": np.mean([s.confidence for s in recent_states]),
-            "average_keypoint_quality": np.mean([s.keypoint_quality for s in recent_states]),
+            "average_confidence": fmean(s.confidence for s in recent_states),
+            "average_keypoint_quality": fmean(s.keypoint_quality for s in recent_states),
             "state_stability": current_state.pose_stability
         }
\ No newline at end of file
@@ -7,26 +7,42 @@ import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from torchvision import transforms
+from torch.nn.utils.fusion import fuse_conv_bn_eval
 import faiss
 from loguru import logger
 
 from ..config.settings import settings
 
 
+def _as_f32_row(vector: np.ndarray) -> np.ndarray:
+    """View a feature vector as the contiguous (1, d) float32 row FAISS expects, copying only if needed."""
+    vector = np.ascontiguousarray(vector, dtype=np.float32)
+    return vector.reshape(1, -1) if vector.ndim == 1 else vector
+
+
 class HorseReIDModel:
     """Horse re-identification model using MegaDescriptor for wildlife-specific feature extraction."""
     
     def __init__(self) -> None:
         self.device = self._setup_device()
         self.model: Optional[nn.Module] = None
-        self.transform = self._setup_transforms()
+        self._setup_transforms()
         self.feature_dimension = 768  # MegaDescriptor output dimension
         self.model_type = "megadescriptor"  # Track which model is loaded
+        self.use_half = False  # FP16 + channels_last inference on CUDA
+        
+        # Reusable pinned host / device staging buffers for CUDA uploads
+        self._host_buffer: Optional[torch.Tensor] = None
+        self._device_buffer: Optional[torch.Tensor] = None
+        self._transfer_stream: Optional[torch.cuda.Stream] = None
+        self._output_buffer: Optional[torch.Tensor] = None
+        self._ema_scratch: Optional[np.ndarray] = None
         
         # Feature cache for similarity search
-        self.feature_index: Optional[faiss.IndexFlatL2] = None
-        self.id_to_index: Dict[str, int] = {}
+        self.feature_index: Optional[faiss.Index] = None  # IndexIDMap2 (flat) or IndexIVFFlat
+        self.id_to_index: Dict[str, int] = {}  # horse_id -> FAISS external id
+        self.index_to_id: Dict[int, str] = {}
+        self._next_faiss_id = 0
         
         self.performance_metrics = {
             "avg_extraction_time": 0.0,
@@ -39,7 +55,7 @@ class HorseReIDModel:
         """Load the MegaDescriptor wildlife re-identification model."""
         try:
             # Initialize FAISS index for similarity search
-            self.feature_index = faiss.IndexFlatL2(self.feature_dimension)
+            self.feature_index = self._create_feature_index()
             logger.info(f"Initialized FAISS index for {self.feature_dimension}-dim features")
             
             # Try to load MegaDescriptor first
@@ -49,7 +65,7 @@ class HorseReIDModel:
                 # Fallback to original CNN model
                 logger.warning("MegaDescriptor unavailable, using CNN fallback")
                 self.feature_dimension = 512  # Reset for CNN model
-                self.feature_index = faiss.IndexFlatL2(self.feature_dimension)
+                self.feature_index = self._create_feature_index()
                 self._load_cnn_fallback()
                 logger.info(f"CNN fallback ReID model loaded on {self.device}")
             
@@ -57,6 +73,35 @@ class HorseReIDModel:
             logger.error(f"Failed to load ReID model: {error}")
             raise
     
+    def _create_feature_index(self) -> faiss.IndexIDMap2:
+        """Create an inner-product index; on unit vectors IP is cosine similarity.
+        
+        The flat index is wrapped in IndexIDMap2 so each horse keeps a stable
+        external id that can be removed, replaced and reconstructed.
+        """
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self.feature_dimension))
+    
+    def _upgrade_to_ivf_index(self) -> None:
+        """Rebuild the flat index as IVF so search cost grows sublinearly with horse count.
+        
+        IndexIVFFlat keeps inner-product scores exact within the probed lists and,
+        unlike HNSW, still supports remove_ids and reconstruct by external id.
+        """
+        count = self.feature_index.ntotal
+        ids = faiss.vector_to_array(self.feature_index.id_map).astype(np.int64)
+        vectors = self.feature_index.index.reconstruct_n(0, count)
+        
+        # sqrt(N) lists keeps k-means training above FAISS's 39 points per centroid
+        nlist = max(1, int(np.sqrt(count)))
+        quantizer = faiss.IndexFlatIP(self.feature_dimension)
+        ivf_index = faiss.IndexIVFFlat(quantizer, self.feature_dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        ivf_index.train(vectors)
+        ivf_index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        ivf_index.add_with_ids(vectors, ids)
+        
+        self.feature_index = ivf_index
+        logger.info(f"Switched ReID feature index to IVF ({nlist} lists) at {count} horses")
+        
     def _load_megadescriptor(self) -> bool:
         """Load MegaDescriptor wildlife ReID model."""
         try:
@@ -71,12 +116,8 @@ class HorseReIDModel:
             self.model_type = "megadescriptor"
             
             # Update transforms for MegaDescriptor (224x224, normalize to [-1,1])
-            self.transform = transforms.Compose([
-                transforms.ToPILImage(),
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),
-                transforms.Normalize([0.5, 0.5, 0.5], [0.5, 0.5, 0.5])  # [-1,1] range
-            ])
+            self._setup_transforms((224, 224), mean=(0.5, 0.5, 0.5), std=(0.5, 0.5, 0.5))
+            self._optimize_for_device()
             
             logger.info("✅ MegaDescriptor wildlife ReID model loaded successfully")
             return True
@@ -93,11 +134,90 @@ class HorseReIDModel:
         self.model = self._create_simple_reid_model()
         self.model.to(self.device)
         self.model.eval()
+        self.model.fuse_for_inference()
         self.model_type = "cnn_fallback"
         
         # Reset transforms for CNN model
-        self.transform = self._setup_transforms()
+        self._setup_transforms()
+        self._optimize_for_device()
         
+    def _optimize_for_device(self) -> None:
+        """Switch the loaded model to FP16 with channels_last memory layout on CUDA."""
+        self.use_half = self.device.type == "cuda"
+        if self.use_half:
+            self.model = self.model.to(memory_format=torch.channels_last).half()
+            self._mean = self._mean.half()
+            self._std = self._std.half()
+            self._transfer_stream = torch.cuda.Stream(device=self.device)
+        else:
+            self._mean = self._mean.float()
+            self._std = self._std.float()
+            if settings.reid_quantize_int8:
+                self._quantize_for_cpu()
+                
+        if settings.reid_compile:
+            self._compile_model()
+            
+    def _compile_model(self) -> None:
+        """Compile the forward pass, falling back to TorchScript and then to eager mode."""
+        height, width = self.input_size
+        dummy = torch.zeros((1, 3, height, width), device=self.device)
+        if self.use_half:
+            dummy = dummy.half().contiguous(memory_format=torch.channels_last)
+            
+        # Compilation is lazy, so warm up here rather than on the first real crop
+        try:
+            mode = "reduce-overhead" if self.device.type == "cuda" else None
+            compiled = torch.compile(self.model, mode=mode, fullgraph=True, dynamic=True)
+            with torch.inference_mode():
+                compiled(dummy)
+            self.model = compiled
+            logger.info(f"Compiled {self.model_type} ReID model with torch.compile")
+            return
+        except Exception as error:
+            logger.warning(f"torch.compile failed for ReID model, trying TorchScript: {error}")
+            
+        try:
+            with torch.inference_mode():
+                traced = torch.jit.optimize_for_inference(torch.jit.trace(self.model, dummy))
+                traced(dummy)
+            self.model = traced
+            logger.info(f"Traced {self.model_type} ReID model with TorchScript")
+        except Exception as error:
+            logger.warning(f"TorchScript tracing failed, keeping eager ReID model: {error}")
+            
+    def _quantize_for_cpu(self, calibration_batches: int = 4) -> None:
+        """Post-training quantize the loaded model to int8 for CPU inference."""
+        try:
+            if self.model_type == "megadescriptor":
+                # Transformer compute is dominated by Linear layers, which quantize dynamically
+                self.model = torch.ao.quantization.quantize_dynamic(self.model, {nn.Linear}, dtype=torch.qint8)
+            else:
+                from torch.ao.quantization import get_default_qconfig_mapping
+                from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+                
+                # FX mode fuses Conv+BN+ReLU and inserts quant/dequant stubs itself
+                height, width = self.input_size
+                qconfig_mapping = get_default_qconfig_mapping(torch.backends.quantized.engine)
+                example_inputs = (torch.zeros(1, 3, height, width),)
+                prepared = prepare_fx(self.model, qconfig_mapping, example_inputs)
+                
+                # Calibrate activation ranges on synthetic crops run through the real preprocessing
+                rng = np.random.default_rng(0)
+                with torch.inference_mode():
+                    for _ in range(calibration_batches):
+                        crops = [
+                            cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (0, 0), 2)
+                            for _ in range(8)
+                        ]
+                        prepared(self._preprocess_crops(crops))
+                self.model = convert_fx(prepared)
+                
+            logger.info(f"Quantized {self.model_type} ReID model to int8 for CPU inference")
+            
+        except Exception as error:
+            logger.warning(f"int8 quantization failed, keeping FP32 ReID model: {error}")
+            
     def _setup_device(self) -> torch.device:
         """Setup computation device for feature extraction."""
         if settings.ml_device == "cuda" and torch.cuda.is_available():
@@ -109,17 +229,80 @@ class HorseReIDModel:
             
         return device
         
-    def _setup_transforms(self) -> transforms.Compose:
-        """Setup image preprocessing transforms for CNN fallback."""
-        return transforms.Compose([
-            transforms.ToPILImage(),
-            transforms.Resize((256, 128)),  # Standard ReID input size
-            transforms.ToTensor(),
-            transforms.Normalize(
-                mean=[0.485, 0.456, 0.406],
-                std=[0.229, 0.224, 0.225]
+    def _setup_transforms(
+        self,
+        input_size: Tuple[int, int] = (256, 128),  # Standard ReID input size
+        mean: Tuple[float, float, float] = (0.485, 0.456, 0.406),
+        std: Tuple[float, float, float] = (0.229, 0.224, 0.225)
+    ) -> None:
+        """Setup tensor-native preprocessing (defaults match the CNN fallback)."""
+        self.input_size = input_size  # (height, width)
+        self._mean = torch.tensor(mean, device=self.device).view(1, 3, 1, 1)
+        self._std = torch.tensor(std, device=self.device).view(1, 3, 1, 1)
+        
+    def _preprocess_crops(self, horse_crops: List[np.ndarray]) -> torch.Tensor:
+        """Resize BGR crops with OpenCV and normalize them as one batch on the device."""
+        height, width = self.input_size
+        
+        if self.device.type == "cuda":
+            input_tensor = self._upload_crops(horse_crops)
+        else:
+            # Resize each crop and flip BGR to RGB; np.stack packs them contiguously
+            batch = np.stack([
+                cv2.resize(crop, (width, height), interpolation=cv2.INTER_LINEAR)[..., ::-1]
+                for crop in horse_crops
+            ])
+            input_tensor = torch.from_numpy(batch)
+            
+        input_tensor = input_tensor.permute(0, 3, 1, 2)
+        if self.use_half:
+            # The permuted NHWC batch already has channels_last strides
+            input_tensor = input_tensor.half()
+        else:
+            input_tensor = input_tensor.contiguous().float()
+        return input_tensor.div_(255).sub_(self._mean).div_(self._std)
+        
+    def _upload_crops(self, horse_crops: List[np.ndarray]) -> torch.Tensor:
+        """Resize crops into pinned staging memory and copy them to the GPU asynchronously."""
+        height, width = self.input_size
+        batch_size = len(horse_crops)
+        
+        if (
+            self._host_buffer is None
+            or self._host_buffer.shape[0] < batch_size
+            or self._host_buffer.shape[1:3] != (height, width)
+        ):
+            capacity = max(batch_size, settings.batch_size)
+            self._host_buffer = torch.empty((capacity, height, width, 3), dtype=torch.uint8, pin_memory=True)
+            self._device_buffer = torch.empty_like(self._host_buffer, device=self.device)
+            
+        # Resize straight into the pinned buffer; it shares memory with this ndarray view
+        host_view = self._host_buffer.numpy()
+        for i, crop in enumerate(horse_crops):
+            cv2.resize(crop, (width, height), dst=host_view[i], interpolation=cv2.INTER_LINEAR)
+            
+        with torch.cuda.stream(self._transfer_stream):
+            self._device_buffer[:batch_size].copy_(self._host_buffer[:batch_size], non_blocking=True)
+        torch.cuda.current_stream(self.device).wait_stream(self._transfer_stream)
+        
+        # Flip BGR to RGB on the device
+        return self._device_buffer[:batch_size].flip(-1)
+        
+    def _download_features(self, output: torch.Tensor) -> np.ndarray:
+        """Copy model output into a reusable pinned float32 buffer and return a numpy copy."""
+        batch_size = output.shape[0]
+        if self._output_buffer is None or self._output_buffer.shape[0] < batch_size:
+            capacity = max(batch_size, settings.batch_size)
+            self._output_buffer = torch.empty(
+                (capacity, self.feature_dimension), dtype=torch.float32, pin_memory=True
             )
-        ])
+            
+        host_view = self._output_buffer[:batch_size]
+        host_view.copy_(output, non_blocking=True)  # also casts FP16 output to float32
+        torch.cuda.current_stream(self.device).synchronize()
+        
+        # The buffer is reused by the next batch, so callers get their own copy
+        return host_view.numpy().copy()
         
     def _create_simple_reid_model(self) -> nn.Module:
         """Create a simple CNN-based ReID model as fallback."""
@@ -154,10 +337,31 @@ class HorseReIDModel:
                 
             def forward(self, x):
                 features = self.backbone(x)
-                features = features.view(features.size(0), -1)
+                features = torch.flatten(features, 1)
                 features = self.classifier(features)
                 return F.normalize(features, p=2, dim=1)  # L2 normalize
                 
+            def fuse_for_inference(self) -> None:
+                """Fold BatchNorm into the preceding Conv2d and strip Dropout (eval only)."""
+                layers = list(self.backbone)
+                fused = []
+                i = 0
+                while i < len(layers):
+                    if (
+                        isinstance(layers[i], nn.Conv2d)
+                        and i + 1 < len(layers)
+                        and isinstance(layers[i + 1], nn.BatchNorm2d)
+                    ):
+                        fused.append(fuse_conv_bn_eval(layers[i], layers[i + 1]))
+                        i += 2
+                    else:
+                        fused.append(layers[i])
+                        i += 1
+                self.backbone = nn.Sequential(*fused)
+                self.classifier = nn.Sequential(
+                    *(layer for layer in self.classifier if not isinstance(layer, nn.Dropout))
+                )
+                
         return SimpleReIDNet(512)  # CNN uses 512-dim features
         
     def extract_features(self, horse_crop: np.ndarray) -> np.ndarray:
@@ -170,39 +374,84 @@ class HorseReIDModel:
         Returns:
             768-dimension feature vector (MegaDescriptor) or 512-dim (CNN fallback)
         """
-        start_time = time.time()
+        return self.extract_features_batch([horse_crop])[0]
         
-        try:
-            if self.model is None:
-                logger.warning("ReID model not loaded, returning random features")
-                return np.random.randn(self.feature_dimension).astype(np.float32)
-                
-            # Convert BGR to RGB
-            rgb_crop = cv2.cvtColor(horse_crop, cv2.COLOR_BGR2RGB)
-            
-            # Preprocess image
-            input_tensor = self.transform(rgb_crop).unsqueeze(0).to(self.device)
+    def extract_features_batch(self, horse_crops: List[np.ndarray]) -> np.ndarray:
+        """
+        Extract re-identification features for several horse crops in one forward pass.
+        
+        Args:
+            horse_crops: Cropped images containing horses (BGR format)
             
-            # Extract features
-            with torch.no_grad():
-                features = self.model(input_tensor)
-                features = features.squeeze().cpu().numpy()
-                
-                # L2 normalize for cosine similarity (important for wildlife ReID)
-                features = features / (np.linalg.norm(features) + 1e-6)
-                
-            processing_time = (time.time() - start_time) * 1000
-            self._update_performance_metrics(processing_time)
+        Returns:
+            (B, feature_dimension) array of L2-normalized feature vectors
+        """
+        start_time = time.time()
+        
+        if not horse_crops:
+            return np.empty((0, self.feature_dimension), dtype=np.float32)
             
-            logger.debug(f"Feature extraction ({self.model_type}) completed in {processing_time:.1f}ms")
-            return features.astype(np.float32)
+        if self.model is None:
+            logger.warning("ReID model not loaded, returning random features")
+            return self._random_features(len(horse_crops))
             
+        try:
+            features = self._forward_crops(horse_crops)
         except Exception as error:
             processing_time = (time.time() - start_time) * 1000
-            logger.error(f"Feature extraction failed after {processing_time:.1f}ms: {error}")
+            logger.error(
+                f"Batched feature extraction for {len(horse_crops)} crops failed after "
+                f"{processing_time:.1f}ms: {error}"
+            )
+            return self._extract_features_per_crop(horse_crops)
             
-            # Return random features as fallback
-            return np.random.randn(self.feature_dimension).astype(np.float32)
+        processing_time = (time.time() - start_time) * 1000
+        self._update_performance_metrics(processing_time / len(horse_crops), len(horse_crops))
+        
+        logger.debug(
+            f"Feature extraction ({self.model_type}) for {len(horse_crops)} crops "
+            f"completed in {processing_time:.1f}ms"
+        )
+        return features
+        
+    def _forward_crops(self, horse_crops: List[np.ndarray]) -> np.ndarray:
+        """Run one forward pass over the crops and return L2-normalized float32 features."""
+        input_tensor = self._preprocess_crops(horse_crops)
+        
+        # Extract features
+        with torch.inference_mode():
+            output = self.model(input_tensor)
+            if self.device.type == "cuda":
+                features = self._download_features(output)
+            else:
+                # Shares memory with the freshly allocated output tensor
+                features = output.numpy()
+                
+        # L2 normalize in place for cosine similarity (important for wildlife ReID)
+        features /= np.linalg.norm(features, axis=1, keepdims=True) + 1e-6
+        return features.astype(np.float32, copy=False)
+        
+    def _extract_features_per_crop(self, horse_crops: List[np.ndarray]) -> np.ndarray:
+        """Retry a failed batch crop by crop so only the crops that fail get random features."""
+        features = self._random_features(len(horse_crops))
+        if len(horse_crops) == 1:
+            return features  # The single crop already failed
+            
+        for i, horse_crop in enumerate(horse_crops):
+            try:
+                features[i] = self._forward_crops([horse_crop])[0]
+            except Exception as error:
+                logger.error(
+                    f"Feature extraction failed for crop {i} "
+                    f"(shape {getattr(horse_crop, 'shape', None)}): {error}"
+                )
+        return features
+        
+    def _random_features(self, count: int) -> np.ndarray:
+        """Unit-length random (count, feature_dimension) features used when extraction is impossible."""
+        features = np.random.randn(count, self.feature_dimension).astype(np.float32)
+        features /= np.linalg.norm(features, axis=1, keepdims=True)
+        return features
             
     def add_horse_to_index(self, horse_id: str, features: np.ndarray) -> None:
         """Add a horse's features to the similarity search index."""
@@ -211,10 +460,16 @@ class HorseReIDModel:
             return
             
         try:
-            # Add features to FAISS index
-            self.feature_index.add(features.reshape(1, -1).astype(np.float32))
-            self.id_to_index[horse_id] = self.feature_index.ntotal - 1
-            
+            # Add unit-length features so inner product equals cosine similarity
+            features = _as_f32_row(features)
+            self._store_features(horse_id, features / (np.linalg.norm(features) + 1e-8))
+            
+            if (
+                isinstance(self.feature_index, faiss.IndexIDMap2)
+                and self.feature_index.ntotal >= settings.reid_ivf_threshold
+            ):
+                self._upgrade_to_ivf_index()
+                
             logger.debug(f"Added horse {horse_id} to feature index (total: {self.feature_index.ntotal})")
             
         except Exception as error:
@@ -237,15 +492,17 @@ class HorseReIDModel:
             return []
             
         try:
-            # Search for similar features
-            query_features = features.reshape(1, -1).astype(np.float32)
-            distances, indices = self.feature_index.search(query_features, min(k, self.feature_index.ntotal))
+            # Search for similar features; scores are cosine similarities,
+            # already sorted in descending order by FAISS
+            query_features = _as_f32_row(features)
+            query_features = query_features / (np.linalg.norm(query_features) + 1e-8)
+            if isinstance(self.feature_index, faiss.IndexIVFFlat):
+                self.feature_index.nprobe = settings.reid_ivf_nprobe
+            scores, indices = self.feature_index.search(query_features, min(k, self.feature_index.ntotal))
             
-            # Convert L2 distances to cosine similarities
             similarities = []
-            for i, (distance, index) in enumerate(zip(distances[0], indices[0])):
-                # Convert L2 distance to cosine similarity (assuming normalized features)
-                similarity = max(0.0, 1.0 - distance / 2.0)
+            for score, index in zip(scores[0], indices[0]):
+                similarity = max(0.0, float(score))
                 
                 if similarity >= threshold:
                     # Find horse_id from index
@@ -253,8 +510,6 @@ class HorseReIDModel:
                     if horse_id:
                         similarities.append((horse_id, similarity))
                         
-            # Sort by similarity score (descending)
-            similarities.sort(key=lambda x: x[1], reverse=True)
             
             logger.debug(f"Found {len(similarities)} similar horses above threshold {threshold}")
             return similarities
@@ -263,12 +518,23 @@ class HorseReIDModel:
             logger.error(f"Similarity search failed: {error}")
             return []
             
+    def _store_features(self, horse_id: str, features: np.ndarray) -> None:
+        """Insert or replace a horse's vector under its external FAISS id."""
+        faiss_id = self.id_to_index.get(horse_id)
+        if faiss_id is None:
+            faiss_id = self._next_faiss_id
+            self._next_faiss_id += 1
+        else:
+            # Replace rather than append so re-added horses never leave stale vectors
+            self.feature_index.remove_ids(np.array([faiss_id], dtype=np.int64))
+            
+        self.feature_index.add_with_ids(_as_f32_row(features), np.array([faiss_id], dtype=np.int64))
+        self.id_to_index[horse_id] = faiss_id
+        self.index_to_id[faiss_id] = horse_id
+        
     def _get_horse_id_from_index(self, faiss_index: int) -> Optional[str]:
-        """Get horse_id from FAISS index position."""
-        for horse_id, index in self.id_to_index.items():
-            if index == faiss_index:
-                return horse_id
-        return None
+        """Get horse_id from FAISS external id."""
+        return self.index_to_id.get(int(faiss_index))
         
     def update_horse_features(self, horse_id: str, new_features: np.ndarray, alpha: float = 0.8) -> None:
         """
@@ -284,19 +550,22 @@ class HorseReIDModel:
             return
             
         try:
-            index_pos = self.id_to_index[horse_id]
-            
-            # Get current features
-            current_features = self.feature_index.reconstruct(index_pos)
+            faiss_id = self.id_to_index[horse_id]
             
+            # Get current features (reconstruct returns a fresh array we can update in place)
+            current_features = self.feature_index.reconstruct(faiss_id)
+            if self._ema_scratch is None or self._ema_scratch.shape != current_features.shape:
+                self._ema_scratch = np.empty_like(current_features)
+                
             # Update with exponential moving average
-            updated_features = alpha * current_features + (1 - alpha) * new_features
+            np.multiply(current_features, alpha, out=current_features)
+            np.multiply(new_features, 1 - alpha, out=self._ema_scratch)
+            current_features += self._ema_scratch
             
             # Re-normalize (important for wildlife ReID)
-            updated_features = updated_features / (np.linalg.norm(updated_features) + 1e-8)
+            current_features /= np.sqrt(current_features @ current_features) + 1e-8
             
-            # TODO: FAISS doesn't support in-place updates efficiently
-            # In production, you'd rebuild the index periodically or use a database
+            self._store_features(horse_id, current_features)
             logger.debug(f"Updated features for horse {horse_id} (alpha={alpha})")
             
         except Exception as error:
@@ -305,12 +574,13 @@ class HorseReIDModel:
     def remove_horse_from_index(self, horse_id: str) -> None:
         """Remove a horse from the similarity index."""
         if horse_id in self.id_to_index:
-            # FAISS doesn't support efficient deletion, so we mark as removed
-            # In production, you'd rebuild the index periodically
-            del self.id_to_index[horse_id]
+            faiss_id = self.id_to_index.pop(horse_id)
+            self.index_to_id.pop(faiss_id, None)
+            if self.feature_index is not None:
+                self.feature_index.remove_ids(np.array([faiss_id], dtype=np.int64))
             logger.debug(f"Removed horse {horse_id} from index")
             
-    def _update_performance_metrics(self, processing_time: float) -> None:
+    def _update_performance_metrics(self, processing_time: float, count: int = 1) -> None:
         """Update performance tracking."""
         alpha = 0.1
         if self.performance_metrics["avg_extraction_time"] == 0:
@@ -320,7 +590,7 @@ class HorseReIDModel:
                 (1 - alpha) * self.performance_metrics["avg_extraction_time"] + 
                 alpha * processing_time
             )
-        self.performance_metrics["total_extractions"] += 1
+        self.performance_metrics["total_extractions"] += count
         
     def get_model_info(self) -> Dict[str, Any]:
         """Get ReID model information and performance."""
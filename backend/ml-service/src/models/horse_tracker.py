@@ -3,7 +3,7 @@ import time
 import math
 from collections import deque
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Tuple, Set
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple, Set
 import numpy as np
 import cv2
 from scipy.optimize import linear_sum_assignment
@@ -12,17 +12,102 @@ from loguru import logger
 from .horse_reid import HorseReIDModel
 
 
+def _bbox_dict_to_xyxy(bbox: Dict[str, float]) -> np.ndarray:
+    """Convert an {x, y, width, height} bbox dict to an (x1, y1, x2, y2) array, NaN when empty."""
+    if not bbox:
+        return np.full(4, np.nan)
+    x, y = bbox["x"], bbox["y"]
+    return np.array([x, y, x + bbox["width"], y + bbox["height"]], dtype=np.float64)
+
+
+def _bboxes_to_xyxy(bboxes: List[Dict[str, float]]) -> np.ndarray:
+    """Stack {x, y, width, height} bbox dicts into a (K, 4) array of x1, y1, x2, y2."""
+    xyxy = np.array([[b["x"], b["y"], b["width"], b["height"]] for b in bboxes], dtype=np.float64).reshape(-1, 4)
+    xyxy[:, 2:] += xyxy[:, :2]
+    return xyxy
+
+
+def _pairwise_iou(boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+    """IoU between every pair of (N, 4) and (M, 4) xyxy boxes, as an (N, M) matrix."""
+    top_left = np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    bottom_right = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    intersection = wh[..., 0] * wh[..., 1]
+
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    union = area1[:, None] + area2[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def _l2_normalize(vector: np.ndarray) -> np.ndarray:
+    """Return a unit-length copy of a feature vector (zero vectors stay zero)."""
+    return vector / (np.linalg.norm(vector) + 1e-8)
+
+
+def _random_features() -> np.ndarray:
+    """Unit-length random features used when no crop can be embedded."""
+    return _l2_normalize(np.random.randn(512).astype(np.float32))
+
+
+def _iou_xyxy(box1: np.ndarray, box2: np.ndarray) -> float:
+    """IoU between two (x1, y1, x2, y2) boxes using scalar float math, 0.0 when the union is empty."""
+    x1a, y1a, x2a, y2a = box1.tolist()
+    x1b, y1b, x2b, y2b = box2.tolist()
+
+    intersection = max(min(x2a, x2b) - max(x1a, x1b), 0.0) * max(min(y2a, y2b) - max(y1a, y1b), 0.0)
+    union = (x2a - x1a) * (y2a - y1a) + (x2b - x1b) * (y2b - y1b) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def _center_dist_xyxy(box1: np.ndarray, box2: np.ndarray) -> float:
+    """Distance between the centers of two (x1, y1, x2, y2) boxes using scalar float math."""
+    x1a, y1a, x2a, y2a = box1.tolist()
+    x1b, y1b, x2b, y2b = box2.tolist()
+    return math.hypot((x1a + x2a) / 2 - (x1b + x2b) / 2, (y1a + y2a) / 2 - (y1b + y2b) / 2)
+
+
+# Largest min(detections, tracks) solved greedily instead of with the Hungarian solver
+GREEDY_ASSIGNMENT_MAX_SIZE = 8
+
+
+def _greedy_iou_assignment(iou_matrix: np.ndarray, iou_threshold: float) -> Tuple[List[int], List[int]]:
+    """
+    Repeatedly match the highest-IoU (row, col) pair above the threshold, removing its row and column.
+
+    Unlike the Hungarian solver this is not globally optimal: with IoU [[0.9, 0.8], [0.85, 0.1]]
+    it takes (0, 0) and leaves row 1 unmatched, where Hungarian matches (0, 1) and (1, 0).
+    """
+    iou = iou_matrix.copy()
+    rows, cols = [], []
+    while iou.size and iou.max() > iou_threshold:
+        row, col = np.unravel_index(iou.argmax(), iou.shape)
+        rows.append(int(row))
+        cols.append(int(col))
+        iou[row, :] = -np.inf
+        iou[:, col] = -np.inf
+    return rows, cols
+
+
+class Appearance(NamedTuple):
+    """One observation in a track's appearance history (arrays are shared references, not copies)."""
+    timestamp: float
+    bbox_xyxy: np.ndarray
+    features: np.ndarray
+    confidence: float
+
+
 @dataclass
 class HorseTrack:
     """Represents a tracked horse across multiple frames."""
     id: str
     tracking_id: int
     color: str
-    feature_vector: np.ndarray
+    feature_vector: np.ndarray  # Invariant: always L2-normalized, so cosine similarity is a dot product
     last_bbox: Dict[str, float]
     last_seen: float
     confidence: float
-    appearance_history: deque = field(default_factory=lambda: deque(maxlen=100))
+    appearance_history: deque = field(default_factory=lambda: deque(maxlen=10))  # of Appearance
     pose_history: deque = field(default_factory=lambda: deque(maxlen=50))
     velocity_history: deque = field(default_factory=lambda: deque(maxlen=10))
 
@@ -34,7 +119,7 @@ class HorseTrack:
 
     # Appearance features
     feature_update_count: int = 0
-    first_appearance_features: Optional[np.ndarray] = None
+    first_appearance_features: Optional[np.ndarray] = None  # L2-normalized like feature_vector
 
     # Thumbnail tracking (for Phase 3)
     best_thumbnail_score: float = 0.0  # confidence * bbox_area
@@ -46,6 +131,14 @@ class HorseTrack:
     horse_name: Optional[str] = None  # Name for official horses
     reid_match_confidence: float = 0.0  # How confident we are this is the matched horse
     matched_official_id: Optional[str] = None  # Original DB ID if matched to official horse
+
+    # Hot-path bbox arrays (x1, y1, x2, y2); last_bbox stays the dict form for outputs
+    last_bbox_xyxy: Optional[np.ndarray] = None
+    predicted_bbox_xyxy: Optional[np.ndarray] = None
+
+    def __post_init__(self) -> None:
+        if self.last_bbox_xyxy is None:
+            self.last_bbox_xyxy = _bbox_dict_to_xyxy(self.last_bbox)
     
 
 class HorseTracker:
@@ -83,6 +176,14 @@ class HorseTracker:
         self.lost_tracks: Dict[str, HorseTrack] = {}
         self.track_history: List[HorseTrack] = []
 
+        # Stacked lost-track state for vectorized re-identification, rebuilt lazily
+        # whenever lost_tracks changes (see _refresh_lost_track_cache)
+        self._lost_ids: List[str] = []
+        self._lost_feat_matrix = np.empty((0, 0), dtype=np.float32)
+        self._lost_bbox_xyxy = np.empty((0, 4), dtype=np.float64)
+        self._lost_last_seen = np.empty(0, dtype=np.float64)
+        self._lost_dirty = True
+
         # Official horses from barn registry (persistent)
         self.official_horses: Dict[str, HorseTrack] = {}
 
@@ -151,13 +252,21 @@ class HorseTracker:
             # Track which official horses have already been matched this frame (prevent duplicates)
             matched_official_horses: Set[str] = set()
 
+            # Extract features in one batch: matched tracks only occasionally (every
+            # 10 frames), unmatched detections always since they need ReID
+            feature_det_indices = [
+                det_idx for det_idx, track_id in matched_pairs
+                if self.tracks[track_id].total_detections % 10 == 0
+            ] + list(unmatched_detections)
+            detection_features = dict(zip(
+                feature_det_indices,
+                self._extract_detection_features([detections[i] for i in feature_det_indices], frame)
+            ))
+
             # Update matched tracks
             updated_tracks = []
             for det_idx, track_id in matched_pairs:
-                # Only extract features for matched tracks occasionally (every 10 frames)
-                features = None
-                if self.tracks[track_id].total_detections % 10 == 0:
-                    features = self._extract_single_detection_features(detections[det_idx], frame)
+                features = detection_features.get(det_idx)  # None for most frames
 
                 track = self._update_track(
                     self.tracks[track_id],
@@ -172,10 +281,10 @@ class HorseTracker:
                 if track.matched_official_id:
                     matched_official_horses.add(track.matched_official_id)
 
-            # Handle unmatched detections - NOW extract features for ReID
+            # Handle unmatched detections using their batch-extracted ReID features
             for det_idx in unmatched_detections:
                 detection = detections[det_idx]
-                features = self._extract_single_detection_features(detection, frame)
+                features = detection_features[det_idx]
 
                 # Try hierarchical reidentification (official → guest → new)
                 # Pass already-matched horses to avoid duplicates
@@ -249,28 +358,28 @@ class HorseTracker:
 
         # Build IoU cost matrix (fast)
         n_detections = len(detections)
-        n_tracks = len(self.tracks)
-        iou_matrix = np.zeros((n_detections, n_tracks))
-
         track_ids = list(self.tracks.keys())
-        for i, detection in enumerate(detections):
-            det_bbox = detection["bbox"]
-            for j, track_id in enumerate(track_ids):
-                track = self.tracks[track_id]
-                iou = self._calculate_iou(det_bbox, track.last_bbox)
-                iou_matrix[i, j] = iou
+        iou_matrix = _pairwise_iou(
+            _bboxes_to_xyxy([detection["bbox"] for detection in detections]),
+            np.stack([track.last_bbox_xyxy for track in self.tracks.values()])
+        )
 
-        # Use Hungarian algorithm with IoU (inverted for cost)
-        cost_matrix = 1.0 - iou_matrix  # Convert IoU to cost
-        row_indices, col_indices = linear_sum_assignment(cost_matrix)
+        iou_threshold = 0.3  # Accept matches with >30% IoU
+        if min(iou_matrix.shape) <= GREEDY_ASSIGNMENT_MAX_SIZE:
+            # Greedy highest-IoU matching: cheaper than the Hungarian solver for a handful of horses,
+            # and can differ from it when one box overlaps several tracks (see _greedy_iou_assignment)
+            row_indices, col_indices = _greedy_iou_assignment(iou_matrix, iou_threshold)
+        else:
+            # Use Hungarian algorithm with IoU (inverted for cost)
+            cost_matrix = 1.0 - iou_matrix  # Convert IoU to cost
+            row_indices, col_indices = linear_sum_assignment(cost_matrix)
 
         # Filter matches by IoU threshold
-        iou_threshold = 0.3  # Accept matches with >30% IoU
         matched_pairs = []
         unmatched_detections = set(range(n_detections))
         unmatched_tracks = set(track_ids)
 
-        for row_idx, col_idx in zip(row_indices, col_indices):
+        for row_idx, col_idx in sorted(zip(row_indices, col_indices)):
             if iou_matrix[row_idx, col_idx] > iou_threshold:
                 track_id = track_ids[col_idx]
                 matched_pairs.append((row_idx, track_id))
@@ -279,36 +388,6 @@ class HorseTracker:
 
         return matched_pairs, list(unmatched_detections), list(unmatched_tracks)
 
-    def _calculate_iou(self, bbox1: Dict[str, float], bbox2: Dict[str, float]) -> float:
-        """Calculate Intersection over Union between two bounding boxes."""
-        x1_min = bbox1["x"]
-        y1_min = bbox1["y"]
-        x1_max = x1_min + bbox1["width"]
-        y1_max = y1_min + bbox1["height"]
-
-        x2_min = bbox2["x"]
-        y2_min = bbox2["y"]
-        x2_max = x2_min + bbox2["width"]
-        y2_max = y2_min + bbox2["height"]
-
-        # Calculate intersection
-        x_inter_min = max(x1_min, x2_min)
-        y_inter_min = max(y1_min, y2_min)
-        x_inter_max = min(x1_max, x2_max)
-        y_inter_max = min(y1_max, y2_max)
-
-        if x_inter_max < x_inter_min or y_inter_max < y_inter_min:
-            return 0.0
-
-        intersection = (x_inter_max - x_inter_min) * (y_inter_max - y_inter_min)
-
-        # Calculate union
-        area1 = bbox1["width"] * bbox1["height"]
-        area2 = bbox2["width"] * bbox2["height"]
-        union = area1 + area2 - intersection
-
-        return intersection / union if union > 0 else 0.0
-
     def _extract_single_detection_features(self, detection: Dict[str, Any], frame: np.ndarray) -> np.ndarray:
         """Extract ReID features for a single detection."""
         try:
@@ -320,21 +399,24 @@ class HorseTracker:
             horse_crop = frame[y1:y2, x1:x2]
 
             if horse_crop.size > 0:
-                # Extract features using ReID model
-                return self.reid_model.extract_features(horse_crop)
+                # Extract features using ReID model (normalized here so the tracker's
+                # unit-length invariant never depends on the ReID model's fallbacks)
+                return _l2_normalize(self.reid_model.extract_features(horse_crop))
             else:
                 # Fallback to random features
-                return np.random.randn(512).astype(np.float32)
+                return _random_features()
 
         except Exception as error:
             logger.warning(f"Feature extraction failed: {error}")
-            return np.random.randn(512).astype(np.float32)
+            return _random_features()
             
     def _extract_detection_features(self, detections: List[Dict[str, Any]], frame: np.ndarray) -> List[np.ndarray]:
-        """Extract ReID features for all detections."""
-        features = []
+        """Extract ReID features for all detections with one batched forward pass."""
+        features: List[Optional[np.ndarray]] = [None] * len(detections)
+        crops = []
+        crop_indices = []
         
-        for detection in detections:
+        for i, detection in enumerate(detections):
             try:
                 bbox = detection["bbox"]
                 x1, y1 = int(bbox["x"]), int(bbox["y"])
@@ -344,16 +426,29 @@ class HorseTracker:
                 horse_crop = frame[y1:y2, x1:x2]
                 
                 if horse_crop.size > 0:
-                    # Extract features using ReID model
-                    feature_vector = self.reid_model.extract_features(horse_crop)
-                    features.append(feature_vector)
+                    crops.append(horse_crop)
+                    crop_indices.append(i)
                 else:
                     # Fallback to random features
-                    features.append(np.random.randn(512).astype(np.float32))
+                    features[i] = _random_features()
                     
             except Exception as error:
                 logger.warning(f"Feature extraction failed for detection: {error}")
-                features.append(np.random.randn(512).astype(np.float32))
+                features[i] = _random_features()
+                
+        if crops:
+            # Extract features for every crop using the ReID model in a single batch, normalized
+            # here so the tracker's unit-length invariant never depends on the ReID model's fallbacks
+            try:
+                batch_features = self.reid_model.extract_features_batch(crops)
+                batch_features = batch_features / (np.linalg.norm(batch_features, axis=1, keepdims=True) + 1e-8)
+            except Exception as error:
+                # Fall back to one extraction per detection so a bad crop only costs its own features
+                logger.warning(f"Batched feature extraction failed, extracting per detection: {error}")
+                batch_features = [self._extract_single_detection_features(detections[i], frame) for i in crop_indices]
+                
+            for i, feature_vector in zip(crop_indices, batch_features):
+                features[i] = feature_vector
                 
         return features
         
@@ -366,21 +461,16 @@ class HorseTracker:
                 
                 # Calculate velocity from position history
                 if len(track.appearance_history) >= 2:
-                    prev_pos = track.appearance_history[-2]["bbox"]
-                    curr_pos = track.last_bbox
+                    prev_pos = track.appearance_history[-2].bbox_xyxy
+                    curr_pos = track.last_bbox_xyxy
                     
-                    vx = (curr_pos["x"] - prev_pos["x"]) / dt if dt > 0 else 0
-                    vy = (curr_pos["y"] - prev_pos["y"]) / dt if dt > 0 else 0
+                    vx = (curr_pos[0] - prev_pos[0]) / dt if dt > 0 else 0
+                    vy = (curr_pos[1] - prev_pos[1]) / dt if dt > 0 else 0
                     
-                    # Predict next position
-                    track.predicted_bbox = {
-                        "x": curr_pos["x"] + vx * dt,
-                        "y": curr_pos["y"] + vy * dt,
-                        "width": curr_pos["width"],
-                        "height": curr_pos["height"]
-                    }
+                    # Predict next position (shift both corners)
+                    track.predicted_bbox_xyxy = curr_pos + np.array([vx, vy, vx, vy]) * dt
                 else:
-                    track.predicted_bbox = track.last_bbox.copy()
+                    track.predicted_bbox_xyxy = track.last_bbox_xyxy.copy()
                     
     def _associate_detections(self, detections: List[Dict[str, Any]], features: List[np.ndarray]) -> Tuple[List[Tuple[int, str]], List[int], List[str]]:
         """Associate detections with tracks using Hungarian algorithm."""
@@ -396,11 +486,15 @@ class HorseTracker:
                 track = self.tracks[track_id]
                 
                 # Calculate IoU cost
-                iou = self._calculate_iou(detection["bbox"], getattr(track, 'predicted_bbox', track.last_bbox))
+                predicted = track.predicted_bbox_xyxy
+                iou = self._calculate_iou(
+                    _bbox_dict_to_xyxy(detection["bbox"]),
+                    predicted if predicted is not None else track.last_bbox_xyxy
+                )
                 iou_cost = 1.0 - iou  # Convert to cost (lower is better)
                 
                 # Calculate feature similarity cost  
-                feature_similarity = self._cosine_similarity(feature, track.feature_vector)
+                feature_similarity = self._cosine_similarity(feature, track.feature_vector, normalized=True)
                 feature_cost = 1.0 - feature_similarity
                 
                 # Combined cost (weighted)
@@ -428,31 +522,15 @@ class HorseTracker:
         
         return matched_pairs, unmatched_detections, unmatched_tracks
         
-    def _calculate_iou(self, bbox1: Dict[str, float], bbox2: Dict[str, float]) -> float:
-        """Calculate Intersection over Union between two bounding boxes."""
-        x1_1, y1_1 = bbox1["x"], bbox1["y"]
-        x2_1, y2_1 = x1_1 + bbox1["width"], y1_1 + bbox1["height"]
-        
-        x1_2, y1_2 = bbox2["x"], bbox2["y"]
-        x2_2, y2_2 = x1_2 + bbox2["width"], y1_2 + bbox2["height"]
-        
-        # Calculate intersection
-        xi1 = max(x1_1, x1_2)
-        yi1 = max(y1_1, y1_2)
-        xi2 = min(x2_1, x2_2)
-        yi2 = min(y2_1, y2_2)
-        
-        inter_area = max(0, xi2 - xi1) * max(0, yi2 - yi1)
-        
-        # Calculate union
-        box1_area = bbox1["width"] * bbox1["height"]
-        box2_area = bbox2["width"] * bbox2["height"]
-        union_area = box1_area + box2_area - inter_area
-        
-        return inter_area / union_area if union_area > 0 else 0
+    def _calculate_iou(self, box1: np.ndarray, box2: np.ndarray) -> float:
+        """Calculate Intersection over Union between two (x1, y1, x2, y2) boxes."""
+        return _iou_xyxy(box1, box2)
         
-    def _cosine_similarity(self, feat1: np.ndarray, feat2: np.ndarray) -> float:
-        """Calculate cosine similarity between feature vectors."""
+    def _cosine_similarity(self, feat1: np.ndarray, feat2: np.ndarray, normalized: bool = False) -> float:
+        """Calculate cosine similarity between feature vectors (a plain dot product if both are unit-length)."""
+        if normalized:
+            return float(np.dot(feat1, feat2))
+            
         dot_product = np.dot(feat1, feat2)
         norm1 = np.linalg.norm(feat1)
         norm2 = np.linalg.norm(feat2)
@@ -467,6 +545,7 @@ class HorseTracker:
         """Update existing track with new detection."""
         # Update position and timing
         track.last_bbox = detection["bbox"]
+        track.last_bbox_xyxy = _bbox_dict_to_xyxy(detection["bbox"])
         track.last_seen = timestamp
         track.frames_since_seen = 0
         track.total_detections += 1
@@ -482,29 +561,29 @@ class HorseTracker:
         # Update feature vector with exponential moving average (only if features provided)
         if features is not None:
             alpha = 0.8  # 80% old features, 20% new
-            track.feature_vector = alpha * track.feature_vector + (1 - alpha) * features
-            track.feature_vector = track.feature_vector / (np.linalg.norm(track.feature_vector) + 1e-8)
+            track.feature_vector = _l2_normalize(alpha * track.feature_vector + (1 - alpha) * features)
             track.feature_update_count += 1
 
             # Update ReID model index
             self.reid_model.add_horse_to_index(track.id, track.feature_vector)
 
-        # Update appearance history
-        track.appearance_history.append({
-            "timestamp": timestamp,
-            "bbox": detection["bbox"].copy(),
-            "features": features.copy() if features is not None else track.feature_vector.copy(),
-            "confidence": detection_conf
-        })
+        # Update appearance history. Feature arrays are never mutated in place (the EMA
+        # above builds a new feature_vector), so references are stored instead of copies
+        track.appearance_history.append(Appearance(
+            timestamp,
+            track.last_bbox_xyxy,
+            features if features is not None else track.feature_vector,
+            detection_conf
+        ))
 
         # Calculate velocity
         if len(track.appearance_history) >= 2:
             prev_appearance = track.appearance_history[-2]
-            dt = timestamp - prev_appearance["timestamp"]
+            dt = timestamp - prev_appearance.timestamp
 
             if dt > 0:
-                dx = detection["bbox"]["x"] - prev_appearance["bbox"]["x"]
-                dy = detection["bbox"]["y"] - prev_appearance["bbox"]["y"]
+                dx = track.last_bbox_xyxy[0] - prev_appearance.bbox_xyxy[0]
+                dy = track.last_bbox_xyxy[1] - prev_appearance.bbox_xyxy[1]
                 velocity = math.sqrt(dx**2 + dy**2) / dt
                 track.velocity_history.append(velocity)
 
@@ -544,7 +623,7 @@ class HorseTracker:
                     continue
 
                 # Calculate feature similarity
-                similarity = self._cosine_similarity(features, track.feature_vector)
+                similarity = self._cosine_similarity(features, track.feature_vector, normalized=True)
 
                 # Lower threshold for official horses (they might look different at different angles)
                 # But higher confidence requirement
@@ -561,27 +640,35 @@ class HorseTracker:
         # PHASE 2: If no official match, try GUEST horses (recently seen unknowns)
         if not best_match and self.lost_tracks:
             logger.debug(f"Phase 2: Checking {len(self.lost_tracks)} guest horses")
-
-            for track_id, track in self.lost_tracks.items():
-                # Check if track was lost recently (within reasonable time window)
-                time_since_lost = timestamp - track.last_seen
-                if time_since_lost > 10.0:  # Don't reidentify tracks lost more than 10 seconds ago
-                    continue
-
-                # Calculate feature similarity
-                similarity = self._cosine_similarity(features, track.feature_vector)
-
-                # Standard threshold for guests
-                if similarity > self.similarity_threshold and similarity > best_similarity:
-                    # Also check spatial proximity (track shouldn't teleport)
-                    spatial_distance = self._calculate_spatial_distance(detection["bbox"], track.last_bbox)
-                    max_movement = time_since_lost * 200  # Max 200 pixels/second movement
-
-                    if spatial_distance < max_movement:
-                        best_match = track
-                        best_similarity = similarity
-                        match_type = "guest"
-                        logger.info(f"👤 Matched guest horse: {track.id} (similarity: {similarity:.3f})")
+            self._refresh_lost_track_cache()
+
+            # Check if tracks were lost recently (within reasonable time window)
+            time_since_lost = timestamp - self._lost_last_seen
+            recent = time_since_lost <= 10.0  # Don't reidentify tracks lost more than 10 seconds ago
+
+            # Feature similarity against every lost track in one matrix-vector product
+            # (detection and track features are both unit-length)
+            similarities = self._lost_feat_matrix @ features
+
+            # Spatial proximity between box centers (track shouldn't teleport)
+            detection_xyxy = _bbox_dict_to_xyxy(detection["bbox"])
+            detection_center = (detection_xyxy[:2] + detection_xyxy[2:]) / 2
+            lost_centers = (self._lost_bbox_xyxy[:, :2] + self._lost_bbox_xyxy[:, 2:]) / 2
+            offsets = lost_centers - detection_center
+            spatial_distance = np.hypot(offsets[:, 0], offsets[:, 1])
+            max_movement = time_since_lost * 200  # Max 200 pixels/second movement
+
+            # Standard threshold for guests
+            candidates = recent & (similarities > self.similarity_threshold) & (spatial_distance < max_movement)
+            if candidates.any():
+                # BLAS can round identical rows differently, so scores within float32 noise
+                # of the best count as ties and the first lost track wins, as in a per-track loop
+                masked = np.where(candidates, similarities, -np.inf)
+                best_index = int(np.argmax(masked >= masked.max() - 1e-6))
+                best_match = self.lost_tracks[self._lost_ids[best_index]]
+                best_similarity = float(similarities[best_index])
+                match_type = "guest"
+                logger.info(f"👤 Matched guest horse: {best_match.id} (similarity: {best_similarity:.3f})")
 
         # Return match with metadata
         if best_match:
@@ -618,7 +705,7 @@ class HorseTracker:
             if not hasattr(track, 'feature_vector') or track.feature_vector is None:
                 continue
 
-            similarity = self._cosine_similarity(features, track.feature_vector)
+            similarity = self._cosine_similarity(features, track.feature_vector, normalized=True)
 
             if similarity > best_similarity:
                 best_match = track
@@ -645,20 +732,20 @@ class HorseTracker:
             id=track_id,
             tracking_id=self.next_track_id - 1,
             color=self._get_next_color(),
-            feature_vector=features.copy(),
+            feature_vector=_l2_normalize(features),
             last_bbox=detection["bbox"].copy(),
             last_seen=timestamp,
             confidence=detection.get("confidence", 0.5),
-            first_appearance_features=features.copy()
+            first_appearance_features=_l2_normalize(features)
         )
 
         # Initialize appearance history
-        track.appearance_history.append({
-            "timestamp": timestamp,
-            "bbox": detection["bbox"].copy(),
-            "features": features.copy(),
-            "confidence": detection.get("confidence", 0.5)
-        })
+        track.appearance_history.append(Appearance(
+            timestamp,
+            track.last_bbox_xyxy,
+            track.first_appearance_features,
+            detection.get("confidence", 0.5)
+        ))
 
         # PHASE 3: Initialize best thumbnail for new track
         if frame is not None:
@@ -684,6 +771,7 @@ class HorseTracker:
         # Move from lost/official to active
         if track.id in self.lost_tracks:
             del self.lost_tracks[track.id]
+            self._lost_dirty = True
         elif track.id in self.official_horses:
             # Don't remove from official_horses - keep the reference
             # But also add to active tracks
@@ -712,6 +800,7 @@ class HorseTracker:
         if track.frames_since_seen >= self.max_lost_frames:
             self.lost_tracks[track_id] = self.tracks[track_id]
             del self.tracks[track_id]
+            self._lost_dirty = True
             
             logger.debug(f"Moved track {track_id} to lost tracks")
             
@@ -732,17 +821,36 @@ class HorseTracker:
             
             # Remove from lost tracks and ReID index
             del self.lost_tracks[track_id]
+            self._lost_dirty = True
             self.reid_model.remove_horse_from_index(track_id)
             
             logger.debug(f"Archived old track: {track_id}")
             
+    def _refresh_lost_track_cache(self) -> None:
+        """Restack lost-track features (already L2-normalized), boxes and last-seen times if lost_tracks changed."""
+        if not self._lost_dirty:
+            return
+            
+        lost = list(self.lost_tracks.values())
+        self._lost_ids = [track.id for track in lost]
+        
+        if lost:
+            self._lost_feat_matrix = np.stack([track.feature_vector for track in lost]).astype(np.float32)
+            self._lost_bbox_xyxy = np.stack([track.last_bbox_xyxy for track in lost])
+        else:
+            self._lost_feat_matrix = np.empty((0, 0), dtype=np.float32)
+            self._lost_bbox_xyxy = np.empty((0, 4), dtype=np.float64)
+        self._lost_last_seen = np.array([track.last_seen for track in lost], dtype=np.float64)
+        
+        self._lost_dirty = False
+        
     def _calculate_track_confidence(self, track: HorseTrack) -> float:
         """Calculate overall confidence score for a track."""
         factors = []
         
         # Detection confidence
         if track.appearance_history:
-            recent_confidences = [app["confidence"] for app in list(track.appearance_history)[-5:]]
+            recent_confidences = [app.confidence for app in list(track.appearance_history)[-5:]]
             avg_detection_conf = np.mean(recent_confidences)
             factors.append(avg_detection_conf)
             
@@ -753,7 +861,7 @@ class HorseTracker:
         # Feature consistency (lower variance = higher confidence)
         if track.feature_update_count >= 3:
             feature_consistency = 1.0 / (1.0 + np.std([
-                self._cosine_similarity(track.first_appearance_features, app["features"])
+                self._cosine_similarity(track.first_appearance_features, app.features, normalized=True)
                 for app in list(track.appearance_history)[-3:]
             ]))
             factors.append(feature_consistency)
@@ -770,15 +878,9 @@ class HorseTracker:
         else:
             return 0.5  # Default confidence for new tracks
             
-    def _calculate_spatial_distance(self, bbox1: Dict[str, float], bbox2: Dict[str, float]) -> float:
-        """Calculate spatial distance between bounding box centers."""
-        center1 = (bbox1["x"] + bbox1["width"] / 2, bbox1["y"] + bbox1["height"] / 2)
-        center2 = (bbox2["x"] + bbox2["width"] / 2, bbox2["y"] + bbox2["height"] / 2)
-        
-        dx = center1[0] - center2[0]
-        dy = center1[1] - center2[1]
-        
-        return math.sqrt(dx**2 + dy**2)
+    def _calculate_spatial_distance(self, box1: np.ndarray, box2: np.ndarray) -> float:
+        """Calculate spatial distance between the centers of two (x1, y1, x2, y2) boxes."""
+        return _center_dist_xyxy(box1, box2)
         
     def _get_next_color(self) -> str:
         """Get next tracking color from palette."""
@@ -975,7 +1077,7 @@ class HorseTracker:
                 # Extract horse data from state
                 features = horse_state.get("features", [])
                 if isinstance(features, list) and len(features) > 0:
-                    feature_vector = np.array(features, dtype=np.float32)
+                    feature_vector = _l2_normalize(np.array(features, dtype=np.float32))
                 else:
                     # Skip horses without valid features
                     logger.warning(f"Skipping horse {horse_id} - no valid features")
@@ -1046,6 +1148,7 @@ class HorseTracker:
                 else:
                     # Guest horses start in lost_tracks (will be reactivated on re-detection)
                     self.lost_tracks[horse_id] = track
+                    self._lost_dirty = True
                     guest_count += 1
                     logger.debug(f"Loaded guest horse {horse_id} (tracking_id: {tracking_id})")
 
@@ -2,6 +2,7 @@
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
+from collections import deque
 from scipy.signal import savgol_filter
 from scipy.interpolate import interp1d
 import logging
@@ -64,8 +65,9 @@ class PoseAnalyzer:
             confidence_threshold: Minimum keypoint confidence
         """
         self.confidence_threshold = confidence_threshold
-        self.pose_history = []  # Store recent poses for temporal analysis
         self.max_history_length = 30  # ~1 second at 30fps
+        # Store recent poses for temporal analysis; the deque drops the oldest
+        self.pose_history = deque(maxlen=self.max_history_length)
         
     def calculate_angle(self, 
                        p1: Tuple[float, float], 
@@ -402,9 +404,6 @@ class PoseAnalyzer:
                 "timestamp": timestamp,
                 "keypoints": keypoints.copy()
             })
-            # Keep only recent history
-            if len(self.pose_history) > self.max_history_length:
-                self.pose_history.pop(0)
         
         # Calculate metrics
         joint_angles = self.calculate_joint_angles(keypoints)
@@ -167,15 +167,17 @@ class PoseValidator:
         
         issues = []
         
-        for i in range(keypoints.shape[0]):
-            # Check only confident keypoints
-            if (keypoints[i, 2] > self.confidence_threshold and 
-                prev_keypoints[i, 2] > self.confidence_threshold):
-                
-                movement = np.linalg.norm(keypoints[i, :2] - prev_keypoints[i, :2])
-                
-                if movement > self.max_movement_per_frame:
-                    issues.append(f"Keypoint {i} moved {movement:.1f} pixels (max: {self.max_movement_per_frame})")
+        # Check only confident keypoints, comparing squared distances so the
+        # square root is only taken for reported keypoints
+        confident = ((keypoints[:, 2] > self.confidence_threshold) &
+                     (prev_keypoints[:, 2] > self.confidence_threshold))
+        delta = keypoints[:, :2] - prev_keypoints[:, :2]
+        movement_sq = np.einsum('ij,ij->i', delta, delta)
+        too_far = confident & (movement_sq > self.max_movement_per_frame ** 2)
+        
+        for i in np.flatnonzero(too_far):
+            movement = np.sqrt(movement_sq[i])
+            issues.append(f"Keypoint {i} moved {movement:.1f} pixels (max: {self.max_movement_per_frame})")
         
         return len(issues) == 0, issues
     
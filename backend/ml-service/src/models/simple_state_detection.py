@@ -48,6 +48,7 @@ class SimpleStateDetector:
             history_length: Number of frames to keep for movement analysis
         """
         self.history_length = history_length
+        # (pose_data, keypoints_dict) pairs, parsed once when appended
         self.pose_history: deque = deque(maxlen=history_length)
         self.current_state = HorseState.UNKNOWN
         
@@ -133,8 +134,7 @@ class SimpleStateDetector:
             return None
         
         # Get previous pose
-        prev_pose = self.pose_history[-1] 
-        prev_keypoints = self.extract_keypoints_dict(prev_pose)
+        _, prev_keypoints = self.pose_history[-1]
         
         # Calculate movement for reliable keypoints
         movements = []
@@ -168,8 +168,7 @@ class SimpleStateDetector:
             return None
         
         # Get previous pose
-        prev_pose = self.pose_history[-1]
-        prev_keypoints = self.extract_keypoints_dict(prev_pose)
+        _, prev_keypoints = self.pose_history[-1]
         
         # Calculate movement specifically for legs/paws
         leg_movements = []
@@ -224,7 +223,7 @@ class SimpleStateDetector:
         detected_state, confidence = self._classify_state(height_ratio, movement_velocity, leg_movement)
         
         # Update history
-        self.pose_history.append(pose_data)
+        self.pose_history.append((pose_data, keypoints_dict))
         self.current_state = detected_state
         
         return SimpleStateResult(
@@ -75,6 +75,11 @@ class ChunkProcessor:
             logger.error(f"Failed to initialize enhanced ML models: {error}")
             raise
 
+    async def close(self) -> None:
+        """Release model workers and database connections."""
+        self.detection_model.close()
+        await self.horse_db.close()
+
     # ============================================================================
     # OFFICIAL HORSES WORKFLOW - Helper Methods
     # ============================================================================
@@ -127,7 +127,7 @@ class SnapshotDetector:
         Returns:
             List of detections with bbox and confidence
         """
-        if self.detection_model is None or self.detection_model.model is None:
+        if self.detection_model is None or not self.detection_model.is_loaded:
             raise RuntimeError("Detection model not loaded")
 
         # Run YOLO inference
@@ -0,0 +1,273 @@
+"""Tests for YOLO horse detection post-processing, batching and async submission."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+import numpy as np
+import torch
+
+from src.config.settings import settings
+from src.models.detection import DETECTION_DTYPE, HorseDetectionModel
+
+HORSE = 17
+DOG = 16
+
+# Raw YOLO boxes per frame as (x1, y1, x2, y2, confidence, class_id)
+FRAME_BOXES = {
+    0: [
+        (10, 10, 110, 90, 0.90, HORSE),    # Kept
+        (200, 50, 320, 150, 0.95, DOG),    # Not a horse
+        (400, 300, 420, 320, 0.95, HORSE), # 20x20 is below the minimum area
+        (0, 400, 300, 450, 0.90, HORSE),   # 6:1 aspect ratio
+        (500, 10, 550, 50, 0.80, HORSE),   # Small box below the boosted threshold
+        (500, 100, 550, 140, 0.90, HORSE), # Small box above the boosted threshold
+    ],
+    1: [],
+    2: [
+        (40, 60, 240, 200, 0.75, HORSE),   # Kept
+        (300, 60, 400, 200, 0.50, HORSE),  # Below the confidence threshold
+    ],
+    3: [
+        (20, 20, 60, 40, 0.99, DOG),
+    ],
+    4: [
+        (100, 100, 260, 220, 0.88, HORSE),
+        (300, 120, 420, 230, 0.81, HORSE),
+    ],
+    5: [
+        (0, 0, 31, 31, 0.99, HORSE),       # 961 px, just under the minimum area
+        (100, 0, 132, 32, 0.99, HORSE),    # 1024 px
+    ],
+}
+
+
+def _frame(frame_id):
+    """A blank frame tagged with its id in the first pixel."""
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[0, 0, 0] = frame_id
+    return frame
+
+
+def _result(frame_id):
+    """An Ultralytics-style result holding the raw boxes for a frame."""
+    boxes = np.array(FRAME_BOXES[frame_id], dtype=np.float32).reshape(-1, 6)
+    return SimpleNamespace(boxes=SimpleNamespace(
+        xyxy=torch.from_numpy(boxes[:, :4]),
+        conf=torch.from_numpy(boxes[:, 4]),
+        cls=torch.from_numpy(boxes[:, 5]),
+    ))
+
+
+class _StubYOLO:
+    """Callable standing in for YOLO that returns one result per input frame."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, source, **kwargs):
+        frames = source if isinstance(source, list) else [source]
+        self.batch_sizes.append(len(frames))
+        return [_result(int(frame[0, 0, 0])) for frame in frames]
+
+
+@pytest.fixture
+def detector():
+    """Create a detection model backed by the stub YOLO."""
+    model = HorseDetectionModel()
+    model.model = _StubYOLO()
+    return model
+
+
+class TestDetectionFilters:
+    """Test per-frame filtering of raw YOLO boxes."""
+
+    def test_filters_keep_only_plausible_horses(self, detector):
+        """Test the class, area, aspect ratio and small-box confidence filters."""
+        detections, _ = detector.detect_horses_array(_frame(0))
+
+        assert detections.dtype == DETECTION_DTYPE
+        np.testing.assert_array_equal(detections["x"], [10, 500])
+        np.testing.assert_array_equal(detections["y"], [10, 100])
+        np.testing.assert_array_equal(detections["width"], [100, 50])
+        np.testing.assert_array_equal(detections["height"], [80, 40])
+        np.testing.assert_allclose(detections["confidence"], [0.90, 0.90])
+        np.testing.assert_array_equal(detections["area"], [8000, 2000])
+        np.testing.assert_allclose(detections["aspect_ratio"], [1.25, 1.25])
+        np.testing.assert_allclose(
+            detections["adjusted_threshold"], [settings.confidence_threshold, settings.confidence_threshold + 0.15]
+        )
+
+    def test_minimum_area(self, detector):
+        """Test a confident horse box just below the minimum area is dropped."""
+        detections, _ = detector.detect_horses_array(_frame(5))
+
+        np.testing.assert_array_equal(detections["x"], [100])
+        np.testing.assert_array_equal(detections["area"], [1024])
+
+    @pytest.mark.parametrize("frame_id", [1, 3])
+    def test_frames_without_horses(self, detector, frame_id):
+        """Test frames with no boxes or no horse boxes give empty detections."""
+        detections, _ = detector.detect_horses_array(_frame(frame_id))
+        dicts, _ = detector.detect_horses(_frame(frame_id))
+
+        assert detections.shape == (0,)
+        assert detections.dtype == DETECTION_DTYPE
+        assert dicts == []
+
+    def test_missing_boxes(self, detector):
+        """Test a result whose boxes are None is skipped."""
+        detector.model = lambda source, **kwargs: [SimpleNamespace(boxes=None)]
+
+        detections, _ = detector.detect_horses_array(_frame(0))
+
+        assert detections.shape == (0,)
+
+    def test_dicts_match_array_rows(self, detector):
+        """Test detect_horses expands the same rows detect_horses_array returns."""
+        detections, _ = detector.detect_horses_array(_frame(4))
+        dicts, _ = detector.detect_horses(_frame(4))
+
+        assert len(dicts) == len(detections) == 2
+        for row, detection in zip(detections, dicts):
+            assert detection["bbox"] == pytest.approx({
+                "x": row["x"], "y": row["y"], "width": row["width"], "height": row["height"]
+            })
+            assert detection["confidence"] == pytest.approx(row["confidence"])
+            assert detection["class_id"] == HORSE
+            assert detection["class_name"] == "horse"
+            assert detection["quality_metrics"] == pytest.approx({
+                "area": row["area"],
+                "aspect_ratio": row["aspect_ratio"],
+                "adjusted_threshold": row["adjusted_threshold"],
+            })
+        assert detector.performance_metrics["total_detections"] == 4
+
+
+class TestBatchDetection:
+    """Test batched detection against per-frame detection."""
+
+    @pytest.mark.parametrize("batch_size, expected_batches", [(4, [4, 2]), (8, [6])])
+    def test_batch_matches_per_frame_detection(self, detector, monkeypatch, batch_size, expected_batches):
+        """Test each frame of a batch gets the detections detect_horses gives it alone."""
+        monkeypatch.setattr(settings, "batch_size", batch_size)
+        frames = [_frame(frame_id) for frame_id in FRAME_BOXES]
+        expected = [detector.detect_horses(frame)[0] for frame in frames]
+        detector.model.batch_sizes.clear()
+
+        batched, processing_time = detector.detect_horses_batch(frames)
+
+        assert batched == expected
+        assert detector.model.batch_sizes == expected_batches
+        assert processing_time >= 0
+
+    def test_batch_keeps_empty_frames_in_place(self, detector):
+        """Test frames without horses keep their slot so results line up with the input."""
+        frames = [_frame(frame_id) for frame_id in (1, 2, 3, 1)]
+
+        batched, _ = detector.detect_horses_batch(frames)
+
+        assert [len(detections) for detections in batched] == [0, 1, 0, 0]
+
+    def test_empty_batch(self, detector):
+        """Test an empty frame list gives no detections and no model call."""
+        batched, processing_time = detector.detect_horses_batch([])
+
+        assert batched == []
+        assert processing_time == 0
+        assert detector.model.batch_sizes == []
+
+    def test_unloaded_model_raises(self):
+        """Test detection before load_models() fails loudly."""
+        model = HorseDetectionModel()
+
+        with pytest.raises(RuntimeError, match="not loaded"):
+            model.detect_horses_batch([_frame(0)])
+
+
+class _SlowStubYOLO(_StubYOLO):
+    """Stub YOLO whose forward blocks without holding the GIL, like an OpenVINO infer call."""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.threads = []
+
+    def __call__(self, source, **kwargs):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.delay)
+        return super().__call__(source, **kwargs)
+
+
+class TestAsyncDetection:
+    """Test detect_horses_async / collect_detections against detect_horses."""
+
+    @pytest.fixture
+    def executor(self):
+        """Single OpenVINO-style worker thread, shut down after the test."""
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yolo-openvino")
+        yield executor
+        executor.shutdown(wait=True)
+
+    def test_sync_fallback_matches_detect_horses(self, detector):
+        """Test backends without a stream or executor still return the per-frame detections."""
+        frames = [_frame(frame_id) for frame_id in FRAME_BOXES]
+        expected = [detector.detect_horses(frame)[0] for frame in frames]
+
+        collected = [detector.collect_detections(detector.detect_horses_async(frame))[0] for frame in frames]
+
+        assert collected == expected
+
+    def test_executor_results_collected_in_order(self, detector, executor):
+        """Test frames submitted one after another through the CPU worker come back in submission order."""
+        frames = [_frame(frame_id) for frame_id in (4, 0, 1, 2, 5, 3, 4)]
+        expected = [detector.detect_horses(frame)[0] for frame in frames]
+        detector.model = _SlowStubYOLO(delay=0.005)
+        detector._executor = executor
+
+        collected = []
+        handle = detector.detect_horses_async(frames[0])
+        for frame in frames[1:]:
+            result = detector.collect_detections(handle)
+            handle = detector.detect_horses_async(frame)
+            collected.append(result[0])
+        collected.append(detector.collect_detections(handle)[0])
+
+        assert collected == expected
+        assert all(name.startswith("yolo-openvino") for name in detector.model.threads)
+
+    def test_executor_overlaps_host_work(self, detector, executor):
+        """Test host work between submit and collect runs while the worker is in the forward."""
+        delay = 0.2
+        detector.model = _SlowStubYOLO(delay=delay)
+        detector._executor = executor
+
+        start = time.perf_counter()
+        handle = detector.detect_horses_async(_frame(0))
+        time.sleep(delay)  # Host-side work, e.g. decoding the next frame
+        detections, processing_time = detector.collect_detections(handle)
+        elapsed = time.perf_counter() - start
+
+        assert len(detections) == 2
+        assert elapsed < 1.5 * delay
+        assert processing_time >= delay * 1e3 * 0.9
+
+    def test_close_stops_worker(self, detector):
+        """Test close() waits for the in-flight forward, stops the worker and is safe to repeat."""
+        detector.model = _SlowStubYOLO(delay=0.05)
+        detector._executor = executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yolo-openvino")
+        handle = detector.detect_horses_async(_frame(4))
+
+        detector.close()
+        detector.close()
+
+        assert detector._executor is None
+        assert handle[2].done()
+        with pytest.raises(RuntimeError):
+            executor.submit(print)
+        assert len(detector.collect_detections(handle)[0]) == 2
+        # Later submissions run synchronously on the caller's thread
+        detections, _ = detector.collect_detections(detector.detect_horses_async(_frame(0)))
+        assert len(detections) == 2
+        assert detector.model.threads[-1] == threading.current_thread().name
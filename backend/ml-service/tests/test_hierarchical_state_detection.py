@@ -0,0 +1,102 @@
+"""Tests for hierarchical horse state detection."""
+import pytest
+import numpy as np
+
+from src.models.hierarchical_state_detection import HierarchicalStateDetector
+
+
+@pytest.fixture
+def detector():
+    """Create a state detector."""
+    return HierarchicalStateDetector()
+
+
+# Standing horse keypoints in STANDARD_NAMES order
+STANDING_POSE = np.array([
+    [60, 80], [65, 75], [70, 75], [90, 100], [110, 130], [120, 132], [112, 170], [122, 172], [110, 220],
+    [122, 222], [200, 120], [195, 140], [205, 142], [197, 180], [207, 182], [195, 220], [207, 222],
+], dtype=float)
+
+
+def _pose_sequence(rng, n_frames):
+    """Create an (F, 17, 3) sequence mixing standing, lying, rolling, walking and grazing frames."""
+    poses = np.zeros((n_frames, len(STANDING_POSE), 3))
+    mode = "stand"
+    for i in range(n_frames):
+        if rng.random() < 0.2:
+            mode = rng.choice(["stand", "lie", "roll", "walk", "graze"])
+        points = STANDING_POSE.copy()
+        if mode in ("lie", "roll"):
+            points[:, 1] = 200 + (points[:, 1] - 150) * 0.15
+            if mode == "roll":
+                angle = rng.uniform(-1.5, 1.5)
+                rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+                center = points.mean(axis=0)
+                points = (points - center) @ rotation + center
+        elif mode == "walk":
+            points[[8, 15], 0] += 20 * np.sin(i)
+            points[[9, 16], 0] -= 20 * np.sin(i)
+        elif mode == "graze":
+            points[:3, 1] += 120
+        poses[i, :, :2] = points + rng.normal(0, 2, points.shape)
+        poses[i, :, 2] = np.where(rng.random(len(points)) < 0.15, rng.uniform(0, 0.5, len(points)), 0.9)
+    return poses
+
+
+def _pose_rows(rng, n_keypoints, confidence=0.9):
+    """Create ordered [x, y, confidence] keypoint rows."""
+    return [[float(x), float(y), confidence] for x, y in rng.uniform(100, 300, (n_keypoints, 2))]
+
+
+class TestPoseDataParsing:
+    """Test keypoint parsing from pose_data."""
+
+    def test_keypoints_updated_in_place_are_reparsed(self, detector):
+        """Test a keypoint list mutated between frames is read fresh, not served from a cache."""
+        rows = _pose_rows(np.random.default_rng(0), detector.N_KP)
+        pose_data = {"keypoints": rows}
+        detector.process_pose_data(pose_data, 0.0)
+        detector.process_pose_data(pose_data, 0.1)
+
+        for row in rows:
+            row[0] += 50.0
+            row[1] += 50.0
+        result, _ = detector.process_pose_data(pose_data, 0.2)
+
+        assert result.movement_velocity == pytest.approx(np.hypot(50.0, 50.0))
+
+
+class TestPoseBatchProcessing:
+    """Test offline batch processing against frame-by-frame processing."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_batch_matches_sequential_processing(self, seed):
+        """Test process_pose_batch over N frames equals N process_pose_data calls."""
+        rng = np.random.default_rng(seed)
+        poses = _pose_sequence(rng, 120)
+        timestamps = [1000.0 + i / 30.0 for i in range(len(poses))]
+        sequential_detector = HierarchicalStateDetector(history_length=30)
+        batch_detector = HierarchicalStateDetector(history_length=30)
+        sequential_detector.current_state_start_time = batch_detector.current_state_start_time = 1000.0
+
+        sequential = [
+            sequential_detector.process_pose_data({"keypoints": pose.tolist()}, timestamp)
+            for pose, timestamp in zip(poses, timestamps)
+        ]
+        batched = batch_detector.process_pose_batch(poses, timestamps)
+
+        assert len(batched) == len(sequential)
+        for (batch_result, batch_events), (result, events) in zip(batched, sequential):
+            # Vectorized and scalar trig can differ in the last bit, so measurements are approximate
+            expected = result.to_dict()
+            actual = batch_result.to_dict()
+            assert actual.pop("measurements") == pytest.approx(expected.pop("measurements"), rel=1e-9, abs=1e-12)
+            assert actual == pytest.approx(expected, rel=1e-9, abs=1e-12)
+            assert [event.to_dict() for event in batch_events] == [event.to_dict() for event in events]
+
+    def test_batch_rejects_bad_shapes(self, detector):
+        """Test malformed pose blocks and timestamp counts are rejected."""
+        with pytest.raises(ValueError):
+            detector.process_pose_batch(np.zeros((4, detector.N_KP, 2)))
+        with pytest.raises(ValueError):
+            detector.process_pose_batch(np.zeros((4, detector.N_KP, 3)), timestamps=[0.0, 1.0])
@@ -0,0 +1,228 @@
+"""Tests for horse re-identification feature extraction and similarity search."""
+import pytest
+import numpy as np
+import cv2
+import faiss
+import torch
+from torchvision import transforms
+
+from src.config.settings import settings
+from src.models.horse_reid import HorseReIDModel
+
+
+@pytest.fixture(scope="module")
+def reid_model():
+    """Load the ReID model once (CNN fallback when MegaDescriptor is unavailable)."""
+    torch.manual_seed(0)
+    model = HorseReIDModel()
+    model.load_model()
+    return model
+
+
+@pytest.fixture
+def horse_crops():
+    """Create BGR horse crops of varying sizes."""
+    rng = np.random.default_rng(0)
+    return [
+        rng.integers(0, 255, (int(rng.integers(40, 300)), int(rng.integers(40, 300)), 3), dtype=np.uint8)
+        for _ in range(6)
+    ]
+
+
+class TestBatchedFeatureExtraction:
+    """Test batched extraction against single-crop extraction."""
+
+    def test_batch_matches_single_crop_extraction(self, reid_model, horse_crops):
+        """Test K crops in one batch give the same features as K single-crop calls."""
+        single = np.stack([reid_model.extract_features(crop) for crop in horse_crops])
+
+        batched = reid_model.extract_features_batch(horse_crops)
+
+        assert batched.shape == (len(horse_crops), reid_model.feature_dimension)
+        assert batched.dtype == np.float32
+        np.testing.assert_allclose(batched, single, atol=1e-5)
+        np.testing.assert_allclose(np.linalg.norm(batched, axis=1), 1.0, rtol=1e-5)
+
+    def test_batch_order_follows_crops(self, reid_model, horse_crops):
+        """Test reordering the crops reorders the feature rows."""
+        order = [3, 0, 5, 1, 4, 2]
+
+        batched = reid_model.extract_features_batch(horse_crops)
+        reordered = reid_model.extract_features_batch([horse_crops[i] for i in order])
+
+        np.testing.assert_allclose(reordered, batched[order], atol=1e-5)
+
+    def test_matches_legacy_pil_preprocessing(self, reid_model):
+        """Test OpenCV preprocessing matches the former PIL pipeline on smooth crops.
+
+        PIL's resize is antialiased and cv2.INTER_LINEAR is not, so pixel-level noise
+        crops drift further apart; natural horse crops are smooth at this scale.
+        """
+        legacy_transform = transforms.Compose([
+            transforms.ToPILImage(),
+            transforms.Resize(reid_model.input_size),
+            transforms.ToTensor(),
+            transforms.Normalize(reid_model._mean.flatten().tolist(), reid_model._std.flatten().tolist()),
+        ])
+        rng = np.random.default_rng(4)
+        crops = [
+            cv2.GaussianBlur(
+                rng.integers(0, 255, (int(rng.integers(60, 400)), int(rng.integers(60, 400)), 3), dtype=np.uint8),
+                (0, 0), 4,
+            )
+            for _ in range(4)
+        ]
+
+        with torch.inference_mode():
+            legacy = reid_model.model(torch.stack([
+                legacy_transform(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)) for crop in crops
+            ])).numpy()
+        legacy /= np.linalg.norm(legacy, axis=1, keepdims=True)
+
+        features = reid_model.extract_features_batch(crops)
+
+        assert np.sum(features * legacy, axis=1).min() > 0.999
+
+    def test_empty_batch(self, reid_model):
+        """Test an empty crop list returns an empty feature matrix."""
+        features = reid_model.extract_features_batch([])
+
+        assert features.shape == (0, reid_model.feature_dimension)
+
+
+class TestFeatureExtractionFallback:
+    """Test that extraction failures only cost the crops that fail."""
+
+    def test_unloaded_model_returns_unit_length_features(self, horse_crops):
+        """Test random fallback features are L2-normalized like real features."""
+        model = HorseReIDModel()
+
+        features = model.extract_features_batch(horse_crops)
+
+        assert features.shape == (len(horse_crops), model.feature_dimension)
+        assert features.dtype == np.float32
+        np.testing.assert_allclose(np.linalg.norm(features, axis=1), 1.0, rtol=1e-5)
+
+    def test_bad_crop_keeps_other_crops_features(self, reid_model, horse_crops):
+        """Test one unprocessable crop falls back alone instead of failing the whole batch."""
+        expected = np.stack([reid_model.extract_features(crop) for crop in horse_crops])
+        bad_crop = np.zeros((64, 64), dtype=np.uint8)  # Grayscale crop cannot be batched as BGR
+        crops = horse_crops[:3] + [bad_crop] + horse_crops[3:]
+
+        features = reid_model.extract_features_batch(crops)
+
+        assert features.shape == (len(crops), reid_model.feature_dimension)
+        np.testing.assert_allclose(np.delete(features, 3, axis=0), expected, atol=1e-5)
+        assert np.linalg.norm(features[3]) == pytest.approx(1.0, rel=1e-5)
+        assert np.abs(features[3] @ expected.T).max() < 0.5  # Random, unrelated to real features
+
+
+@pytest.fixture
+def index_model():
+    """Create a ReID model with only a small FAISS feature index (no network loaded)."""
+    model = HorseReIDModel()
+    model.feature_dimension = 32
+    model.feature_index = model._create_feature_index()
+    return model
+
+
+def _unit_rows(rng, count, dimension=32):
+    """Random L2-normalized float32 rows."""
+    rows = rng.standard_normal((count, dimension)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def _brute_force(features_by_id, query, k):
+    """Reference cosine top-k over the live horses."""
+    ids = list(features_by_id)
+    scores = np.stack([features_by_id[i] for i in ids]) @ (query / np.linalg.norm(query))
+    order = np.argsort(-scores, kind="stable")[:k]
+    return [(ids[i], float(scores[i])) for i in order]
+
+
+class TestFeatureIndex:
+    """Test the id-keyed FAISS store and its flat-to-IVF upgrade."""
+
+    def test_readding_horse_replaces_features(self, index_model):
+        """Test adding a horse again replaces its vector instead of duplicating it."""
+        old_features, new_features, other = _unit_rows(np.random.default_rng(5), 3)
+        index_model.add_horse_to_index("horse_001", old_features)
+        index_model.add_horse_to_index("horse_002", other)
+
+        index_model.add_horse_to_index("horse_001", new_features)
+
+        assert index_model.feature_index.ntotal == 2
+        assert index_model.find_similar_horses(new_features, k=2, threshold=0.99) == [
+            ("horse_001", pytest.approx(1.0, abs=1e-5))
+        ]
+        assert index_model.find_similar_horses(old_features, k=2, threshold=0.99) == []
+
+    def test_remove_horse(self, index_model):
+        """Test a removed horse is deleted from the index and can be added back."""
+        features = _unit_rows(np.random.default_rng(6), 3)
+        for i, row in enumerate(features):
+            index_model.add_horse_to_index(f"horse_{i}", row)
+
+        index_model.remove_horse_from_index("horse_1")
+
+        assert index_model.feature_index.ntotal == 2
+        assert "horse_1" not in index_model.id_to_index
+        remaining = index_model.find_similar_horses(features[1], k=3, threshold=-1.0)
+        assert sorted(horse for horse, _ in remaining) == ["horse_0", "horse_2"]
+
+        index_model.add_horse_to_index("horse_1", features[1])
+        assert index_model.find_similar_horses(features[1], k=1, threshold=0.99)[0][0] == "horse_1"
+
+    def test_update_horse_features_writes_back(self, index_model):
+        """Test the feature EMA replaces the stored vector."""
+        old_features, new_features = _unit_rows(np.random.default_rng(7), 2)
+        index_model.add_horse_to_index("horse_001", old_features)
+
+        index_model.update_horse_features("horse_001", new_features, alpha=0.8)
+
+        expected = 0.8 * old_features + 0.2 * new_features
+        expected /= np.linalg.norm(expected)
+        stored = index_model.feature_index.reconstruct(index_model.id_to_index["horse_001"])
+        assert index_model.feature_index.ntotal == 1
+        np.testing.assert_allclose(stored, expected, atol=1e-6)
+
+    def test_search_stays_correct_across_ivf_upgrade(self, index_model, monkeypatch):
+        """Test the flat index is rebuilt as IVF at the threshold with ids, replacements and removals intact."""
+        monkeypatch.setattr(settings, "reid_ivf_threshold", 200)
+        rng = np.random.default_rng(8)
+        features = _unit_rows(rng, 260)
+        live = {}
+
+        for i, row in enumerate(features[:199]):
+            index_model.add_horse_to_index(f"horse_{i}", row)
+            live[f"horse_{i}"] = row
+        assert isinstance(index_model.feature_index, faiss.IndexIDMap2)
+
+        for i, row in enumerate(features[199:], start=199):
+            index_model.add_horse_to_index(f"horse_{i}", row)
+            live[f"horse_{i}"] = row
+        assert isinstance(index_model.feature_index, faiss.IndexIVFFlat)
+
+        # Replace and remove after the upgrade
+        replacement = _unit_rows(rng, 1)[0]
+        index_model.add_horse_to_index("horse_10", replacement)
+        live["horse_10"] = replacement
+        for horse_id in ("horse_3", "horse_250"):
+            index_model.remove_horse_from_index(horse_id)
+            del live[horse_id]
+        assert index_model.feature_index.ntotal == len(live)
+
+        # Every live horse is its own best match, even with a single probed list
+        monkeypatch.setattr(settings, "reid_ivf_nprobe", 1)
+        for horse_id, row in live.items():
+            assert index_model.find_similar_horses(row, k=1, threshold=0.99)[0][0] == horse_id
+
+        # Probing every list makes IVF search exact
+        monkeypatch.setattr(settings, "reid_ivf_nprobe", index_model.feature_index.nlist)
+        for query in _unit_rows(rng, 20):
+            result = index_model.find_similar_horses(query, k=5, threshold=-1.0)
+            expected = _brute_force(live, query, 5)
+            assert [horse for horse, _ in result] == [horse for horse, _ in expected]
+            np.testing.assert_allclose(
+                [score for _, score in result], [max(0.0, score) for _, score in expected], atol=1e-5
+            )
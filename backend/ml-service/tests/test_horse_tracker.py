@@ -0,0 +1,305 @@
+"""Tests for horse tracker association and re-identification."""
+import pytest
+import numpy as np
+from unittest.mock import Mock, patch
+from scipy.optimize import linear_sum_assignment
+
+from src.models.horse_tracker import (
+    GREEDY_ASSIGNMENT_MAX_SIZE,
+    HorseTracker,
+    _bbox_dict_to_xyxy,
+    _greedy_iou_assignment,
+)
+
+
+def _guest_state(features, x, y, last_updated=0.0):
+    """Build a persisted guest-horse state as loaded from the barn registry."""
+    return {
+        "features": list(features),
+        "last_updated": last_updated,
+        "bbox": {"x": x, "y": y, "width": 80, "height": 60},
+    }
+
+
+@pytest.fixture
+def frame():
+    """Create a sample video frame."""
+    return np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+
+
+def _unit(vector):
+    """L2-normalize a feature vector."""
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _scalar_guest_match(tracker, features, detection, timestamp):
+    """Reference per-track loop for guest re-identification (phase 2 of _try_reidentification)."""
+    best_match, best_similarity = None, 0.0
+    detection_xyxy = _bbox_dict_to_xyxy(detection["bbox"])
+    for track in tracker.lost_tracks.values():
+        time_since_lost = timestamp - track.last_seen
+        if time_since_lost > 10.0:
+            continue
+        similarity = tracker._cosine_similarity(features, track.feature_vector)
+        if similarity > tracker.similarity_threshold and similarity > best_similarity:
+            if tracker._calculate_spatial_distance(detection_xyxy, track.last_bbox_xyxy) < time_since_lost * 200:
+                best_match, best_similarity = track, similarity
+    return best_match
+
+
+def _detection(x, y, width=80, height=60):
+    """Build a detection dict."""
+    return {"bbox": {"x": float(x), "y": float(y), "width": float(width), "height": float(height)},
+            "confidence": 0.9}
+
+
+def _crop_features(crop):
+    """Deterministic unit-length stand-in features derived from a crop."""
+    features = np.resize(crop.astype(np.float32).ravel(), 512) + 1.0
+    return features / np.linalg.norm(features)
+
+
+class TestGreedyIoUAssignment:
+    """Test greedy IoU matching used for small association problems."""
+
+    def test_matches_highest_iou_first(self):
+        """Test pairs are taken in descending IoU order."""
+        iou = np.array([[0.5, 0.0, 0.0], [0.0, 0.0, 0.7], [0.0, 0.9, 0.0]])
+
+        rows, cols = _greedy_iou_assignment(iou, 0.3)
+
+        assert list(zip(rows, cols)) == [(2, 1), (1, 2), (0, 0)]
+
+    def test_threshold_is_exclusive(self):
+        """Test pairs at or below the threshold are never matched."""
+        iou = np.array([[0.3, 0.2], [0.1, 0.31]])
+
+        rows, cols = _greedy_iou_assignment(iou, 0.3)
+
+        assert list(zip(rows, cols)) == [(1, 1)]
+
+    def test_does_not_modify_input(self):
+        """Test the caller's IoU matrix is left intact."""
+        iou = np.array([[0.9, 0.4], [0.4, 0.8]])
+        original = iou.copy()
+
+        _greedy_iou_assignment(iou, 0.3)
+
+        np.testing.assert_array_equal(iou, original)
+
+    @pytest.mark.parametrize("shape", [(2, 5), (5, 2), (0, 3), (3, 0)])
+    def test_rectangular_matrices(self, shape):
+        """Test each row and column is used at most once for non-square matrices."""
+        iou = np.random.default_rng(0).uniform(0.0, 1.0, shape)
+
+        rows, cols = _greedy_iou_assignment(iou, 0.3)
+
+        assert len(rows) == len(set(rows)) <= min(shape)
+        assert len(cols) == len(set(cols)) <= min(shape)
+        assert all(iou[r, c] > 0.3 for r, c in zip(rows, cols))
+
+    def test_agrees_with_hungarian_for_unambiguous_overlaps(self):
+        """Test greedy and Hungarian matching agree when each box overlaps one track."""
+        iou = np.array([[0.8, 0.05, 0.0], [0.1, 0.0, 0.6], [0.0, 0.75, 0.02]])
+
+        rows, cols = _greedy_iou_assignment(iou, 0.3)
+        hungarian = [(r, c) for r, c in zip(*linear_sum_assignment(1.0 - iou)) if iou[r, c] > 0.3]
+
+        assert sorted(zip(rows, cols)) == hungarian
+
+    def test_differs_from_hungarian_for_contested_overlaps(self):
+        """Test the documented case where greedy matching leaves a pair Hungarian would match."""
+        iou = np.array([[0.9, 0.8], [0.85, 0.1]])
+
+        rows, cols = _greedy_iou_assignment(iou, 0.3)
+        hungarian = [(r, c) for r, c in zip(*linear_sum_assignment(1.0 - iou)) if iou[r, c] > 0.3]
+
+        assert list(zip(rows, cols)) == [(0, 0)]
+        assert hungarian == [(0, 1), (1, 0)]
+
+    @pytest.mark.parametrize("n, uses_hungarian", [
+        (GREEDY_ASSIGNMENT_MAX_SIZE, False),
+        (GREEDY_ASSIGNMENT_MAX_SIZE + 1, True),
+    ])
+    def test_association_solver_selection(self, n, uses_hungarian):
+        """Test association is greedy up to the size limit and Hungarian above it, with the same result."""
+        tracker = HorseTracker()
+        for i in range(n):
+            detection = {"bbox": {"x": 60.0 * i, "y": 0.0, "width": 50.0, "height": 50.0}, "confidence": 0.9}
+            tracker._create_new_track(detection, np.ones(512, dtype=np.float32), 0.0)
+        detections = [
+            {"bbox": {"x": 60.0 * i + 2, "y": 1.0, "width": 50.0, "height": 50.0}, "confidence": 0.9}
+            for i in reversed(range(n))
+        ]
+
+        with patch("src.models.horse_tracker.linear_sum_assignment", wraps=linear_sum_assignment) as solver:
+            matched_pairs, unmatched_detections, unmatched_tracks = tracker._associate_detections_optimized(
+                detections, 1.0
+            )
+
+        assert solver.called == uses_hungarian
+        track_ids = list(tracker.tracks)
+        assert matched_pairs == [(i, track_ids[n - 1 - i]) for i in range(n)]
+        assert unmatched_detections == [] and unmatched_tracks == []
+
+
+class TestGuestReidentification:
+    """Test vectorized guest re-identification against the per-track reference loop."""
+
+    def test_matches_scalar_reference(self):
+        """Test random guests, ages, positions and empty boxes give the reference match."""
+        rng = np.random.default_rng(2)
+        base = rng.standard_normal(512)
+
+        for trial in range(50):
+            known_horses = {}
+            for i in range(int(rng.integers(1, 12))):
+                features = base + rng.normal(0, rng.uniform(0.2, 1.5), 512)
+                state = _guest_state(features, *rng.uniform(0, 600, 2), last_updated=rng.uniform(0, 12))
+                if rng.random() < 0.2:
+                    state["bbox"] = {}  # Persisted guest without a position
+                known_horses[f"default_horse_{i + 1:03d}"] = state
+            tracker = HorseTracker(known_horses=known_horses)
+            features = _unit(base + rng.normal(0, 0.3, 512))
+            detection = _detection(*rng.uniform(0, 600, 2))
+
+            expected = _scalar_guest_match(tracker, features, detection, 12.0)
+            result = tracker._try_reidentification(features, detection, 12.0, set())
+
+            if expected is None:
+                assert result is None, trial
+            else:
+                assert result[0] is expected, trial
+                assert result[1] == pytest.approx(tracker._cosine_similarity(features, expected.feature_vector))
+                assert result[2] == "guest"
+
+    def test_guest_without_bbox_never_matches(self):
+        """Test a loaded guest with an empty bbox fails the spatial gate instead of matching anywhere."""
+        features = _unit(np.arange(512) % 7 + 1.0)
+        state = _guest_state(features, 0, 0)
+        state["bbox"] = {}
+        tracker = HorseTracker(known_horses={"default_horse_001": state})
+
+        assert tracker._try_reidentification(features, _detection(100, 100), 1.0, set()) is None
+
+    def test_ties_pick_first_lost_track(self):
+        """Test equally similar guests resolve to the first one, like the reference loop."""
+        features = _unit(np.arange(512) % 5 + 1.0)
+        tracker = HorseTracker(known_horses={
+            f"default_horse_{i:03d}": _guest_state(features, 100, 100) for i in (1, 2, 3)
+        })
+
+        result = tracker._try_reidentification(features, _detection(105, 100), 1.0, set())
+
+        assert result[0].id == "default_horse_001"
+
+    def test_cache_follows_lost_track_changes(self):
+        """Test the stacked lost-track cache is rebuilt on load, lose, reactivate and cleanup."""
+        rng = np.random.default_rng(3)
+        features_a, features_b, features_c = (_unit(rng.standard_normal(512)) for _ in range(3))
+        tracker = HorseTracker(
+            max_lost_frames=1,
+            known_horses={"default_horse_009": _guest_state(features_c, 300, 300, last_updated=0.0)},
+        )
+        track_a = tracker._create_new_track(_detection(0, 0), features_a, 0.0)
+        track_b = tracker._create_new_track(_detection(200, 0), features_b, 0.0)
+
+        # Loaded guest is searchable
+        result = tracker._try_reidentification(features_c, _detection(305, 300), 1.0, set())
+        assert result[0].id == "default_horse_009"
+
+        # Mark both tracks lost
+        tracker._mark_track_lost(track_a.id, 1.0)
+        tracker._mark_track_lost(track_b.id, 1.0)
+        assert tracker._try_reidentification(features_a, _detection(5, 0), 2.0, set())[0] is track_a
+
+        # Reactivated track is no longer a re-identification candidate
+        tracker._reactivate_track(track_a, _detection(100, 0), features_a, 2.0)
+        assert tracker._try_reidentification(features_a, _detection(100, 0), 2.5, set()) is None
+        assert tracker._try_reidentification(features_b, _detection(205, 0), 2.5, set())[0] is track_b
+
+        # Lost again within the session: the cache picks up its new position and features
+        tracker._mark_track_lost(track_a.id, 3.0)
+        assert tracker._try_reidentification(features_a, _detection(400, 0), 3.1, set()) is None  # Too far
+        result = tracker._try_reidentification(track_a.feature_vector, _detection(100, 0), 3.1, set())
+        assert result[0] is track_a
+        assert result[1] == pytest.approx(1.0, abs=1e-5)
+
+        # Cleaned-up tracks are dropped from the cache
+        tracker._cleanup_old_tracks(40.0)
+        assert not tracker.lost_tracks
+        tracker._refresh_lost_track_cache()
+        assert tracker._lost_ids == [] and tracker._lost_feat_matrix.shape[0] == 0
+
+
+class TestBatchedFeatureExtraction:
+    """Test batched ReID extraction for a frame's detections."""
+
+    def test_failed_batch_only_costs_the_bad_crop(self, frame):
+        """Test a failing batch falls back per detection and keeps the good crops' features."""
+        tracker = HorseTracker()
+        tracker.reid_model = Mock()
+        tracker.reid_model.extract_features_batch.side_effect = RuntimeError("batch failed")
+
+        def extract_features(crop):
+            if crop.shape[1] == 33:
+                raise RuntimeError("bad crop")
+            return _crop_features(crop)
+
+        tracker.reid_model.extract_features.side_effect = extract_features
+        detections = [
+            {"bbox": {"x": 10, "y": 20, "width": 60, "height": 40}, "confidence": 0.9},
+            {"bbox": {"x": 200, "y": 100, "width": 33, "height": 50}, "confidence": 0.9},
+            {"bbox": {"x": 400, "y": 300, "width": 90, "height": 70}, "confidence": 0.9},
+        ]
+
+        features = tracker._extract_detection_features(detections, frame)
+
+        np.testing.assert_allclose(features[0], _crop_features(frame[20:60, 10:70]), rtol=1e-6)
+        np.testing.assert_allclose(features[2], _crop_features(frame[300:370, 400:490]), rtol=1e-6)
+        assert features[1].shape == (512,)
+        assert np.linalg.norm(features[1]) == pytest.approx(1.0, rel=1e-5)
+
+    def test_batch_matches_per_detection_extraction(self, frame):
+        """Test one batched call returns the same features as per-detection extraction."""
+        tracker = HorseTracker()
+        tracker.reid_model = Mock()
+        tracker.reid_model.extract_features_batch.side_effect = lambda crops: np.stack(
+            [_crop_features(crop) for crop in crops]
+        )
+        tracker.reid_model.extract_features.side_effect = _crop_features
+        detections = [
+            {"bbox": {"x": 10, "y": 20, "width": 60, "height": 40}, "confidence": 0.9},
+            {"bbox": {"x": 700, "y": 20, "width": 60, "height": 40}, "confidence": 0.9},  # Empty crop
+            {"bbox": {"x": 400, "y": 300, "width": 90, "height": 70}, "confidence": 0.9},
+        ]
+
+        features = tracker._extract_detection_features(detections, frame)
+
+        assert tracker.reid_model.extract_features_batch.call_count == 1
+        for i in (0, 2):
+            np.testing.assert_allclose(
+                features[i], tracker._extract_single_detection_features(detections[i], frame), rtol=1e-6
+            )
+        assert np.linalg.norm(features[1]) == pytest.approx(1.0, rel=1e-5)
+
+
+class TestReidentificationFallback:
+    """Test re-identification when the ReID model can only return fallback features."""
+
+    def test_unloaded_model_features_never_reidentify_guests(self, frame):
+        """Test random fallback features stay below the similarity threshold."""
+        rng = np.random.default_rng(1)
+        known_horses = {
+            f"default_horse_{i:03d}": _guest_state(rng.standard_normal(768), 100 + 10 * i, 100)
+            for i in range(1, 4)
+        }
+        tracker = HorseTracker(known_horses=known_horses)  # ReID model is never loaded
+        detection = {"bbox": {"x": 110, "y": 105, "width": 80, "height": 60}, "confidence": 0.9}
+
+        for _ in range(200):
+            features = tracker._extract_detection_features([detection], frame)[0]
+
+            assert np.linalg.norm(features) == pytest.approx(1.0, rel=1e-5)
+            assert tracker._try_reidentification(features, detection, 1.0, set()) is None
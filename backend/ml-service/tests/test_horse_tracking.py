@@ -5,7 +5,7 @@ import cv2
 from unittest.mock import Mock, AsyncMock
 
 from src.models.horse_reid import HorseReIDModel
-from src.models.horse_tracker import HorseTracker, HorseTrack
+from src.models.horse_tracker import Appearance, HorseTracker, HorseTrack
 from src.services.horse_database import HorseDatabaseService
 
 
@@ -141,12 +141,12 @@ class TestHorseTracker:
         )
         
         # Add some appearance history
-        track.appearance_history.append({
-            "timestamp": 1.0,
-            "bbox": {"x": 100, "y": 100, "width": 50, "height": 100},
-            "features": np.random.randn(512).astype(np.float32),
-            "confidence": 0.8
-        })
+        track.appearance_history.append(Appearance(
+            timestamp=1.0,
+            bbox_xyxy=np.array([100.0, 100.0, 150.0, 200.0]),
+            features=np.random.randn(512).astype(np.float32),
+            confidence=0.8
+        ))
         track.total_detections = 5
         
         confidence = tracker._calculate_track_confidence(track)
@@ -4,7 +4,7 @@ import numpy as np
 from unittest.mock import Mock, MagicMock
 
 from src.models.pose_analysis import PoseAnalyzer, PoseMetrics
-from src.models.gait_classifier import GaitClassifier, GaitType, ActionType
+from src.models.gait_classifier import GaitClassifier, GaitType, ActionType, _head_direction
 from src.models.pose_validator import PoseValidator, ValidationResult
 
 
@@ -321,6 +321,143 @@ class TestGaitClassifier:
         assert 0 <= metrics.confidence <= 1
         assert 0 <= metrics.symmetry_score <= 1
         assert 0 <= metrics.regularity_score <= 1
+    
+    def test_classify_batch_matches_sequential(self, classifier, pose_sequence):
+        """Test batch classification matches per-frame classification."""
+        keypoints = np.stack([p["keypoints"] for p in pose_sequence])
+        timestamps = np.array([p["timestamp"] for p in pose_sequence])
+        
+        sequential = []
+        for kps, ts in zip(keypoints, timestamps):
+            classifier.add_pose(kps, ts)
+            sequential.append(classifier.classify(fps=30.0))
+        
+        batch = GaitClassifier(window_size=30).classify_batch(keypoints, timestamps, fps=30.0)
+        
+        assert len(batch) == len(sequential)
+        for expected, actual in zip(sequential, batch):
+            if expected is None:
+                assert actual is None
+                continue
+            assert actual.gait_type == expected.gait_type
+            assert actual.action_type == expected.action_type
+            assert actual.stride_frequency == pytest.approx(expected.stride_frequency)
+            assert actual.symmetry_score == pytest.approx(expected.symmetry_score)
+            assert actual.regularity_score == pytest.approx(expected.regularity_score)
+            assert actual.confidence == pytest.approx(expected.confidence, rel=1e-5)
+
+
+def _standing_metrics(head_height, back_angle=15.0, neck_angle=120.0):
+    """Pose metrics for a horse standing still."""
+    return PoseMetrics(
+        joint_angles={"neck": neck_angle},
+        stride_length=None,
+        back_angle=back_angle,
+        head_height=head_height,
+        leg_extension={},
+        center_of_mass=(110.0, 200.0),
+        velocity=0.0,
+        confidence=0.9,
+    )
+
+
+class TestHeadPositionActions:
+    """Test head-down versus head-up action classification."""
+
+    @pytest.fixture
+    def classifier(self):
+        """Create a gait classifier instance."""
+        return GaitClassifier(window_size=30)
+
+    @pytest.fixture
+    def head_down_keypoints(self, sample_keypoints):
+        """Keypoints with the nose lowered well below the neck."""
+        keypoints = sample_keypoints.copy()
+        keypoints[2, :2] = [105, 210]  # nose
+        keypoints[:2, 1] += 120  # eyes follow the head down
+        return keypoints
+
+    def test_head_direction(self, sample_keypoints, head_down_keypoints):
+        """Test the head vector points along neck -> nose and low confidence gives NaN."""
+        head_up = _head_direction(sample_keypoints)
+        head_down = _head_direction(head_down_keypoints)
+
+        assert head_up.shape == (2,)
+        assert head_up.dtype == np.float32
+        np.testing.assert_allclose(head_up, [0.0, -1.0], atol=1e-6)
+        assert np.hypot(*head_down) == pytest.approx(1.0, rel=1e-6)
+        assert head_down[1] > 0.7
+
+        sample_keypoints[2, 2] = 0.1  # Nose not confidently detected
+        assert np.isnan(_head_direction(sample_keypoints)).all()
+
+    def test_head_direction_batch(self, sample_keypoints, head_down_keypoints):
+        """Test a stacked (N, 17, 3) sequence gives the per-frame head vectors."""
+        missing_head = sample_keypoints.copy()
+        missing_head[3, 2] = 0.1  # Neck not confidently detected
+        frames = [sample_keypoints, head_down_keypoints, missing_head]
+
+        directions = _head_direction(np.stack(frames))
+
+        assert directions.shape == (3, 2)
+        np.testing.assert_array_equal(directions, [_head_direction(frame) for frame in frames])
+
+    def test_head_down_grazing_or_drinking(self, classifier, head_down_keypoints):
+        """Test a lowered head is grazing with a level back and drinking otherwise."""
+        head_direction = _head_direction(head_down_keypoints)
+
+        # Small head_height would read as head up; the head vector takes precedence
+        grazing = classifier.classify_action(_standing_metrics(100, back_angle=15), GaitType.STANDING, head_direction)
+        drinking = classifier.classify_action(_standing_metrics(100, back_angle=30), GaitType.STANDING, head_direction)
+
+        assert grazing == ActionType.GRAZING
+        assert drinking == ActionType.DRINKING
+
+    def test_head_up_standing_or_alert(self, classifier, sample_keypoints):
+        """Test a raised head is standing with a relaxed neck and alert with a tight one."""
+        head_direction = _head_direction(sample_keypoints)
+
+        # Large head_height would read as head down; the head vector takes precedence
+        standing = classifier.classify_action(_standing_metrics(250, neck_angle=120), GaitType.STANDING, head_direction)
+        alert = classifier.classify_action(_standing_metrics(250, neck_angle=60), GaitType.STANDING, head_direction)
+
+        assert standing == ActionType.STANDING
+        assert alert == ActionType.ALERT
+
+    @pytest.mark.parametrize("head_height, expected", [
+        (250, ActionType.GRAZING),
+        (100, ActionType.STANDING),
+    ])
+    def test_missing_head_keypoint_falls_back_to_head_height(
+        self, classifier, head_down_keypoints, head_height, expected
+    ):
+        """Test a low-confidence nose falls back to head_height instead of the head vector."""
+        head_down_keypoints[2, 2] = 0.1
+        head_direction = _head_direction(head_down_keypoints)
+
+        action = classifier.classify_action(_standing_metrics(head_height), GaitType.STANDING, head_direction)
+
+        assert action == expected
+
+    @pytest.mark.parametrize("head_height, expected", [
+        (250, ActionType.GRAZING),
+        (100, ActionType.STANDING),
+    ])
+    def test_no_head_direction_falls_back_to_head_height(self, classifier, head_height, expected):
+        """Test callers without a head direction are classified from head_height alone."""
+        action = classifier.classify_action(_standing_metrics(head_height), GaitType.STANDING)
+
+        assert action == expected
+
+    def test_add_pose_classifies_grazing(self, classifier, head_down_keypoints):
+        """Test the newest frame's head vector reaches classify_action for a grazing horse."""
+        for i in range(30):
+            classifier.add_pose(head_down_keypoints, timestamp=i / 30.0)
+
+        metrics = classifier.classify(fps=30.0)
+
+        assert metrics.gait_type == GaitType.STANDING
+        assert metrics.action_type in (ActionType.GRAZING, ActionType.DRINKING)
 
 
 class TestPoseValidator: